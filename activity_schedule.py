@@ -0,0 +1,135 @@
+import math
+import time
+
+
+DAY = 86400.0
+MAX_STEPS = 1000  # Search limit for schedules whose parts never line up
+EPSILON = 1e-6  # Steps land just past a boundary rather than on it
+
+
+def parse_clock(text, name=""):
+    """"HH:MM" or "HH:MM:SS" as seconds after midnight"""
+    try:
+        parts = [int(p) for p in str(text).split(":")]
+        if len(parts) not in (2, 3):
+            raise ValueError
+        hours, minutes = parts[0], parts[1]
+        seconds = parts[2] if len(parts) == 3 else 0
+        if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"{name}: schedule time {text!r} is not HH:MM")
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def parse_schedule(raw, name=""):
+    """A macro's "schedule" entry as an ActivitySchedule, or None when absent.
+
+    {"on_min": 5, "every_min": 20,              duty cycle from session start
+     "windows": [["08:00", "12:00"], ...],      local time of day, may wrap midnight
+     "max_runtime_min": 90}                     only the session's first 90 minutes
+    """
+    if not raw:
+        return None
+    try:
+        on = raw.get("on_min")
+        every = raw.get("every_min")
+        max_runtime = raw.get("max_runtime_min")
+        on = float(on) * 60 if on is not None else None
+        every = float(every) * 60 if every is not None else None
+        max_runtime = float(max_runtime) * 60 if max_runtime is not None else None
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: schedule on_min, every_min and max_runtime_min must be numbers")
+    if (on is None) != (every is None):
+        raise ValueError(f"{name}: schedule needs both on_min and every_min for a duty cycle")
+    if every is not None and not 0 < on <= every:
+        raise ValueError(f"{name}: schedule on_min must be above 0 and at most every_min")
+    if max_runtime is not None and max_runtime <= 0:
+        raise ValueError(f"{name}: schedule max_runtime_min must be above 0")
+
+    windows = []
+    for window in raw.get("windows", ()):
+        if len(window) != 2:
+            raise ValueError(f"{name}: schedule windows are [start, end] pairs")
+        start, end = parse_clock(window[0], name), parse_clock(window[1], name)
+        if start == end:
+            raise ValueError(f"{name}: schedule window {window[0]}-{window[1]} is empty")
+        windows.append((start, end))
+    return ActivitySchedule(on, every, tuple(windows), max_runtime)
+
+
+def _time_of_day(wall):
+    t = time.localtime(wall)
+    return t.tm_hour * 3600 + t.tm_min * 60 + t.tm_sec + wall % 1
+
+
+class ActivitySchedule:
+    """When a macro may fire.
+
+    Duty cycle and max runtime count seconds of session time since start
+    (`elapsed`), windows go by the local wall clock (`wall`). The macro is
+    active only while every part that is set allows it.
+    """
+    __slots__ = ("on", "every", "windows", "max_runtime")
+
+    def __init__(self, on=None, every=None, windows=(), max_runtime=None):
+        self.on = on
+        self.every = every
+        self.windows = windows  # ((start, end) seconds after midnight, ...)
+        self.max_runtime = max_runtime
+
+    def wait_time(self, elapsed, wall):
+        """Seconds until the macro is active (0 if it is now), or None if
+        it never will be again"""
+        waited = 0.0
+        for _ in range(MAX_STEPS):
+            t = elapsed + waited
+            if self.max_runtime is not None and t >= self.max_runtime:
+                return None
+            step = 0.0
+            if self.every:
+                phase = t % self.every
+                if phase >= self.on:
+                    step = self.every - phase + EPSILON
+            if not step and self.windows:
+                step = self._until_window(wall + waited)
+            if not step:
+                return waited
+            waited += step
+        return None
+
+    def active_for(self, elapsed, wall):
+        """Seconds left in the active stretch the macro is in now, as
+        (session seconds, wall clock seconds). Duty cycle and max runtime
+        run out in session time, which stands still while paused; windows
+        close by the wall clock, which doesn't. Either may be inf."""
+        session_left = math.inf
+        if self.max_runtime is not None:
+            session_left = self.max_runtime - elapsed
+        if self.every:
+            session_left = min(session_left, self.on - elapsed % self.every)
+        wall_left = self._window_left(wall) if self.windows else math.inf
+        return max(session_left, 0.0), max(wall_left, 0.0)
+
+    def _until_window(self, wall):
+        now = _time_of_day(wall)
+        best = DAY
+        for start, end in self.windows:
+            if self._inside(now, start, end):
+                return 0.0
+            best = min(best, (start - now) % DAY)
+        return best + EPSILON
+
+    def _window_left(self, wall):
+        now = _time_of_day(wall)
+        left = 0.0
+        for start, end in self.windows:
+            if self._inside(now, start, end):
+                left = max(left, (end - now) % DAY)
+        return left
+
+    @staticmethod
+    def _inside(now, start, end):
+        if start <= end:
+            return start <= now < end
+        return now >= start or now < end  # Wraps past midnight
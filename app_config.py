@@ -0,0 +1,34 @@
+import copy
+import json
+
+
+CONFIG_FILE = "config.json"
+
+DEFAULT_CENTER_ALIGNMENT = {
+    "name": "Center Alignment",
+    "enabled": True,
+    "is_center": True,
+    "center_config": {
+        "mode": "Auto",
+        "trigger_key1": "f",
+        "trigger_key2": "g",
+        "pattern": "Alternate Both",
+        "interval": 1.0
+    }
+}
+
+
+def default_center_alignment():
+    return copy.deepcopy(DEFAULT_CENTER_ALIGNMENT)
+
+
+def read_config(path=CONFIG_FILE):
+    """Load config.json, filling in the entries MacroApp falls back on"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {}
+    data.setdefault("macros", [])
+    data.setdefault("center_alignment", default_center_alignment())
+    return data
@@ -0,0 +1,172 @@
+import copy
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView,
+    QDoubleSpinBox, QSpinBox
+)
+from PySide6.QtCore import Qt
+
+
+COLUMNS = ("Name", "Key", "Delay (s)", "Repeat", "Enabled")
+
+
+class BatchEditDialog(QDialog):
+    """Apply one change to many macros at once.
+
+    Works on a copy of the entries; nothing reaches the app until the
+    dialog is accepted, and then the caller applies the whole batch with
+    a single list refresh and a single save.
+    """
+
+    def __init__(self, macros, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Batch Edit")
+        self.setMinimumSize(560, 480)
+        self.macros = copy.deepcopy(macros)
+
+        self.setStyleSheet("""
+            QDialog { background-color: #1e1e1e; color: #ffffff; }
+            QLabel { color: #dddddd; padding: 2px; }
+            QTableWidget {
+                background-color: #2a2a2a;
+                color: #ffffff;
+                gridline-color: #3a3a3a;
+                border: 1px solid #3a3a3a;
+                selection-background-color: #505050;
+            }
+            QHeaderView::section {
+                background-color: #1e1e1e;
+                color: #bbbbbb;
+                border: none;
+                padding: 4px;
+            }
+            QDoubleSpinBox, QSpinBox {
+                background-color: #2a2a2a;
+                color: #ffffff;
+                padding: 6px;
+                border-radius: 6px;
+                border: 1px solid #3a3a3a;
+            }
+            QPushButton {
+                background-color: #3a3a3a;
+                color: #ffffff;
+                border-radius: 6px;
+                padding: 8px 14px;
+            }
+            QPushButton:hover { background-color: #505050; }
+        """)
+
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        self.hint = QLabel()
+        layout.addWidget(self.hint)
+
+        self.table = QTableWidget(len(self.macros), len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.itemSelectionChanged.connect(self.update_hint)
+        layout.addWidget(self.table)
+        for i in range(len(self.macros)):
+            self.fill_row(i)
+
+        # Delay: set outright or scale
+        delay_row = QHBoxLayout()
+        self.delay_spin = QDoubleSpinBox()
+        self.delay_spin.setRange(0, 1800)
+        self.delay_spin.setDecimals(2)
+        self.delay_spin.setValue(0.5)
+        set_delay_btn = QPushButton("Set delay")
+        set_delay_btn.clicked.connect(lambda: self.apply(delay=self.delay_spin.value()))
+        self.scale_spin = QDoubleSpinBox()
+        self.scale_spin.setRange(0.01, 100)
+        self.scale_spin.setDecimals(2)
+        self.scale_spin.setValue(1.0)
+        self.scale_spin.setPrefix("× ")
+        scale_btn = QPushButton("Scale delay")
+        scale_btn.clicked.connect(self.scale_delay)
+        delay_row.addWidget(self.delay_spin)
+        delay_row.addWidget(set_delay_btn)
+        delay_row.addStretch()
+        delay_row.addWidget(self.scale_spin)
+        delay_row.addWidget(scale_btn)
+        layout.addLayout(delay_row)
+
+        # Repeat and enabled state
+        state_row = QHBoxLayout()
+        self.repeat_spin = QSpinBox()
+        self.repeat_spin.setRange(-1, 9999)
+        self.repeat_spin.setValue(-1)
+        self.repeat_spin.setSpecialValueText("Loop")
+        set_repeat_btn = QPushButton("Set repeat")
+        set_repeat_btn.clicked.connect(lambda: self.apply(repeat=self.repeat_spin.value()))
+        enable_btn = QPushButton("Enable")
+        enable_btn.clicked.connect(lambda: self.apply(enabled=True))
+        disable_btn = QPushButton("Disable")
+        disable_btn.clicked.connect(lambda: self.apply(enabled=False))
+        state_row.addWidget(self.repeat_spin)
+        state_row.addWidget(set_repeat_btn)
+        state_row.addStretch()
+        state_row.addWidget(enable_btn)
+        state_row.addWidget(disable_btn)
+        layout.addLayout(state_row)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        save_btn = QPushButton("Save")
+        save_btn.clicked.connect(self.accept)
+        buttons.addWidget(cancel_btn)
+        buttons.addWidget(save_btn)
+        layout.addLayout(buttons)
+
+        self.update_hint()
+
+    def fill_row(self, i):
+        m = self.macros[i]
+        repeat = m.get("repeat", -1)
+        values = (
+            m.get("name", ""),
+            m["key"].upper(),
+            f"{float(m.get('delay', 0.0)):.2f}",
+            "Loop" if repeat == -1 else str(repeat),
+            "Yes" if m.get("enabled", True) else "No",
+        )
+        for col, text in enumerate(values):
+            item = QTableWidgetItem(text)
+            if col:
+                item.setTextAlignment(Qt.AlignCenter)
+            self.table.setItem(i, col, item)
+
+    def selected_rows(self):
+        return sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+
+    def update_hint(self):
+        count = len(self.selected_rows())
+        self.hint.setText(
+            f"{count} of {len(self.macros)} selected" if count
+            else "Select rows (Ctrl/Shift-click) to change them together"
+        )
+
+    def apply(self, **changes):
+        for i in self.selected_rows():
+            self.macros[i].update(changes)
+            self.fill_row(i)
+
+    def scale_delay(self):
+        factor = self.scale_spin.value()
+        for i in self.selected_rows():
+            m = self.macros[i]
+            m["delay"] = round(min(float(m.get("delay", 0.0)) * factor, 1800), 3)
+            self.fill_row(i)
+
+    def get_macros(self):
+        """The edited copies, in the same order as the macros passed in"""
+        return self.macros
@@ -0,0 +1,205 @@
+"""Benchmarks for the macro runner and its control surfaces.
+
+Usage:
+    python benchmark.py control [--count N] [--address PATH]
+    python benchmark.py pause_resume [--macros N] [--pause SECONDS]
+    python benchmark.py contention [--macros N] [--hogs N] [--priority LEVEL] [--cpu N]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from runner_stats import percentile
+
+
+def report(name, samples, unit=1e6, suffix="us"):
+    samples = sorted(samples)
+    print(
+        f"{name}: n={len(samples)} "
+        f"p50={percentile(samples, 50) * unit:.1f}{suffix} "
+        f"p90={percentile(samples, 90) * unit:.1f}{suffix} "
+        f"p99={percentile(samples, 99) * unit:.1f}{suffix} "
+        f"max={samples[-1] * unit:.1f}{suffix}"
+    )
+
+
+class FakeKeyboard:
+    """Stands in for pynput's Controller so benchmarks inject nothing"""
+
+    def press(self, key):
+        pass
+
+    def release(self, key):
+        pass
+
+
+def max_burst(times, window):
+    """Largest number of timestamps falling inside any `window`-second span"""
+    times = sorted(times)
+    best = lo = 0
+    for hi, t in enumerate(times):
+        while t - times[lo] > window:
+            lo += 1
+        best = max(best, hi - lo + 1)
+    return best
+
+
+# ---------- Pause / resume burst ----------
+def run_pause_resume(macros, pause, freeze, stagger, window):
+    from macro_runner import MacroRunner
+
+    runner = MacroRunner(keyboard=FakeKeyboard())
+    runner.freeze_on_pause = freeze
+    runner.resume_stagger = stagger
+    fires = []
+    runner.add_fire_listener(lambda key, fired_at: fires.append(fired_at))
+
+    runner.start(macros)
+    time.sleep(1.0)
+    paused_at = time.monotonic()
+    runner.pause()
+    time.sleep(pause)
+    resumed_at = time.monotonic()
+    runner.resume()
+    time.sleep(max(1.0, stagger * 2))
+    runner.stop()
+
+    before = [t for t in fires if paused_at - 0.5 <= t < paused_at]
+    after = [t for t in fires if resumed_at <= t < resumed_at + 0.5]
+    return max_burst(before, window), max_burst(after, window), len(after)
+
+
+def bench_pause_resume(args):
+    """Fires landing together right after a resume, with and without
+    pause-aware deadlines and resume staggering"""
+    rng = random.Random(1)
+    macros = [
+        {"name": f"m{i}", "key": f"k{i}", "delay": rng.uniform(0.2, 1.0), "repeat": -1, "enabled": True}
+        for i in range(args.macros)
+    ]
+    window = args.window / 1000.0
+    stagger = args.stagger / 1000.0
+
+    for label, freeze, stag in (
+        ("legacy (paused time counts)", False, 0.0),
+        ("legacy + stagger", False, stagger),
+        ("freeze on pause", True, 0.0),
+        ("freeze on pause + stagger", True, stagger),
+    ):
+        steady, burst, total = run_pause_resume(macros, args.pause, freeze, stag, window)
+        print(
+            f"{label}: max {burst} fires within {args.window:.0f}ms after resume "
+            f"({total} fires in first 500ms, steady-state max {steady})"
+        )
+
+
+# ---------- CPU contention ----------
+def burn(cpus):
+    """Busy loop standing in for a game or encoder competing for the CPU"""
+    if cpus is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    while True:
+        pass
+
+
+def run_contention(macros, duration, priority, cpus):
+    from macro_runner import MacroRunner
+
+    runner = MacroRunner(keyboard=FakeKeyboard())
+    runner.thread_priority = priority
+    runner.cpu_affinity = cpus
+    lateness = []
+    runner.add_press_listener(
+        lambda key, due, pressed_at: due is not None and lateness.append(pressed_at - due)
+    )
+    runner.start(macros)
+    time.sleep(duration)
+    runner.stop()
+    return lateness, runner.thread_tuner.summary()
+
+
+def bench_contention(args):
+    """Fire lateness with every core kept busy, at normal priority and at
+    the requested priority and affinity"""
+    rng = random.Random(1)
+    macros = [
+        {"name": f"m{i}", "key": f"k{i}", "delay": rng.uniform(0.02, 0.1), "repeat": -1, "enabled": True}
+        for i in range(args.macros)
+    ]
+    cpus = [args.cpu] if args.cpu is not None else None
+    hogs = [
+        multiprocessing.Process(target=burn, args=(cpus,), daemon=True)
+        for _ in range(args.hogs or 2 * (os.cpu_count() or 1))
+    ]
+    for hog in hogs:
+        hog.start()
+    try:
+        for label, priority, affinity in (
+            ("normal priority", "normal", None),
+            (f"{args.priority} priority", args.priority, cpus),
+        ):
+            lateness, effective = run_contention(macros, args.duration, priority, affinity)
+            print(f"{label} ({effective}, {len(hogs)} busy processes):")
+            report("  lateness", lateness, unit=1e3, suffix="ms")
+            late = sum(1 for t in lateness if t > args.budget / 1000.0)
+            print(f"  {late} of {len(lateness)} fires over {args.budget:.1f}ms late")
+    finally:
+        for hog in hogs:
+            hog.terminate()
+
+
+# ---------- Control socket round trip ----------
+def bench_control(args):
+    """Measure request/reply latency against a running app's control socket"""
+    from control_server import ControlClient
+
+    client = ControlClient(args.address)
+    try:
+        for _ in range(min(100, args.count)):  # Warm up
+            client.request("ping")
+
+        ping = [client.timed_request("ping")[1] for _ in range(args.count)]
+        status = [client.timed_request("status")[1] for _ in range(args.count)]
+    finally:
+        client.close()
+
+    report("ping", ping)
+    report("status", status)
+
+
+def main(argv=None):
+    from control_server import DEFAULT_ADDRESS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="scenario", required=True)
+
+    control = sub.add_parser("control", help="control socket round-trip latency")
+    control.add_argument("--count", type=int, default=10000)
+    control.add_argument("--address", default=DEFAULT_ADDRESS)
+    control.set_defaults(func=bench_control)
+
+    pause_resume = sub.add_parser("pause_resume", help="fire burst size after resume")
+    pause_resume.add_argument("--macros", type=int, default=30)
+    pause_resume.add_argument("--pause", type=float, default=2.0, help="seconds paused")
+    pause_resume.add_argument("--window", type=float, default=10.0, help="burst window in ms")
+    pause_resume.add_argument("--stagger", type=float, default=200.0, help="resume stagger in ms")
+    pause_resume.set_defaults(func=bench_pause_resume)
+
+    contention = sub.add_parser("contention", help="fire lateness with the CPU saturated")
+    contention.add_argument("--macros", type=int, default=20)
+    contention.add_argument("--duration", type=float, default=5.0, help="seconds per run")
+    contention.add_argument("--hogs", type=int, default=0, help="busy processes (default 2 per core)")
+    contention.add_argument("--priority", choices=("high", "realtime"), default="realtime")
+    contention.add_argument("--cpu", type=int, help="pin runner threads and busy processes to this core")
+    contention.add_argument("--budget", type=float, default=1.0, help="lateness budget in ms")
+    contention.set_defaults(func=bench_contention)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import threading
+
+from PySide6.QtWidgets import (
+    QDialog, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QComboBox, QDoubleSpinBox, QMessageBox
+)
+
+from pynput import keyboard
+
+from key_listener import KeySignal
+
+
+# ---------- Center Alignment Edit Dialog ----------
+class CenterAlignmentDialog(QDialog):
+    def __init__(self, center_config, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Edit Center Alignment")
+        self.setMinimumSize(400, 350)
+        
+        self.setStyleSheet("""
+            QDialog { background-color: #1e1e1e; color: #ffffff; }
+            QLabel { color: #dddddd; padding: 2px; }
+            QComboBox, QDoubleSpinBox {
+                background-color: #2a2a2a;
+                color: #ffffff;
+                padding: 8px;
+                border-radius: 6px;
+                border: 1px solid #3a3a3a;
+            }
+            QPushButton {
+                background-color: #3a3a3a;
+                color: #ffffff;
+                border-radius: 6px;
+                padding: 10px 20px;
+            }
+            QPushButton:hover { background-color: #505050; }
+        """)
+        
+        layout = QVBoxLayout(self)
+        layout.setSpacing(16)
+        layout.setContentsMargins(20, 20, 20, 20)
+        
+        # Title
+        title = QLabel("Center Alignment Macro")
+        title.setStyleSheet("font-size: 16px; font-weight: bold; color: white;")
+        layout.addWidget(title)
+        
+        desc = QLabel("Presses: Left (,) → 1ms → Right (.) or Right (.) → 1ms → Left (,)")
+        desc.setStyleSheet("font-size: 12px; color: #888;")
+        layout.addWidget(desc)
+        
+        # Mode selection
+        mode_label = QLabel("Mode:")
+        mode_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(mode_label)
+        
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(["Auto", "Manual"])
+        self.mode_combo.setCurrentText(center_config.get("mode", "Auto"))
+        self.mode_combo.currentTextChanged.connect(self.on_mode_changed)
+        layout.addWidget(self.mode_combo)
+        
+        # Manual keybinds
+        self.manual_label = QLabel("Trigger Keys:")
+        self.manual_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(self.manual_label)
+        
+        manual_layout = QHBoxLayout()
+        
+        left_layout = QVBoxLayout()
+        left_layout.addWidget(QLabel("Left Right"))
+        self.key1_btn = QPushButton(center_config.get("trigger_key1", "f").upper())
+        self.key1_btn.clicked.connect(lambda: self.capture_key(1))
+        left_layout.addWidget(self.key1_btn)
+        
+        right_layout = QVBoxLayout()
+        right_layout.addWidget(QLabel("Right Left"))
+        self.key2_btn = QPushButton(center_config.get("trigger_key2", "g").upper())
+        self.key2_btn.clicked.connect(lambda: self.capture_key(2))
+        right_layout.addWidget(self.key2_btn)
+        
+        manual_layout.addLayout(left_layout)
+        manual_layout.addLayout(right_layout)
+        
+        self.manual_widget = QWidget()
+        self.manual_widget.setLayout(manual_layout)
+        layout.addWidget(self.manual_widget)
+        
+        # Auto settings
+        self.auto_label = QLabel("Auto Settings:")
+        self.auto_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(self.auto_label)
+        
+        auto_layout = QVBoxLayout()
+        
+        pattern_label = QLabel("Pattern:")
+        auto_layout.addWidget(pattern_label)
+        
+        self.pattern_combo = QComboBox()
+        self.pattern_combo.addItems(["Alternate Both", "Only Left Right", "Only Right Left"])
+        self.pattern_combo.setCurrentText(center_config.get("pattern", "Alternate Both"))
+        auto_layout.addWidget(self.pattern_combo)
+        
+        interval_label = QLabel("Interval (seconds):")
+        auto_layout.addWidget(interval_label)
+        
+        self.interval_spin = QDoubleSpinBox()
+        self.interval_spin.setRange(0.1, 1800)
+        self.interval_spin.setDecimals(2)
+        self.interval_spin.setValue(center_config.get("interval", 1.0))
+        auto_layout.addWidget(self.interval_spin)
+        
+        self.auto_widget = QWidget()
+        self.auto_widget.setLayout(auto_layout)
+        layout.addWidget(self.auto_widget)
+        
+        layout.addStretch()
+        
+        # Buttons
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        
+        save_btn = QPushButton("Save")
+        save_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(save_btn)
+        
+        layout.addLayout(btn_layout)
+        
+        self.on_mode_changed(self.mode_combo.currentText())
+        
+        self.key_signal = KeySignal()
+        self.key_signal.captured.connect(self.on_key_captured)
+        self.capturing_key = None
+    
+    def on_mode_changed(self, mode):
+        is_manual = mode == "Manual"
+        self.manual_label.setVisible(is_manual)
+        self.manual_widget.setVisible(is_manual)
+        self.auto_label.setVisible(not is_manual)
+        self.auto_widget.setVisible(not is_manual)
+    
+    def capture_key(self, key_num):
+        self.capturing_key = key_num
+        QMessageBox.information(self, "Capture Key", "Press a key")
+        
+        def listen():
+            def on_press(k):
+                try:
+                    key = k.char
+                except AttributeError:
+                    key = str(k).replace("Key.", "")
+                self.key_signal.captured.emit(key)
+                return False
+            
+            with keyboard.Listener(on_press=on_press) as l:
+                l.join()
+        
+        threading.Thread(target=listen, daemon=True).start()
+    
+    def on_key_captured(self, key):
+        if self.capturing_key == 1:
+            self.key1_btn.setText(key.upper())
+        elif self.capturing_key == 2:
+            self.key2_btn.setText(key.upper())
+        self.capturing_key = None
+    
+    def get_config(self):
+        return {
+            "mode": self.mode_combo.currentText(),
+            "trigger_key1": self.key1_btn.text().lower(),
+            "trigger_key2": self.key2_btn.text().lower(),
+            "pattern": self.pattern_combo.currentText(),
+            "interval": self.interval_spin.value()
+        }
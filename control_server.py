@@ -0,0 +1,191 @@
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+from log_pipeline import get_logger
+
+
+log = get_logger("control")
+
+
+# Unix socket on POSIX, named pipe on Windows; multiprocessing picks the
+# family from the address format.
+if sys.platform == "win32":
+    DEFAULT_ADDRESS = r"\\.\pipe\bdp_macro"
+else:
+    DEFAULT_ADDRESS = os.path.join(tempfile.gettempdir(), "bdp_macro.sock")
+
+COMMANDS = (
+    "ping", "status", "start", "stop", "pause", "resume",
+    "profile", "config", "loglevel", "subscribe",
+)
+
+
+def parse_message(data):
+    """Split a raw message into (command, argument)"""
+    text = data.decode("utf-8").strip()
+    command, _, arg = text.partition(" ")
+    return command.lower(), arg
+
+
+class ControlServer:
+    """Local control socket for driving the app from scripts.
+
+    Each message is one length-prefixed frame holding a UTF-8 line,
+    "<command> [argument]". Every request gets exactly one reply frame,
+    "ok [detail]" or "error <reason>". After "subscribe" the connection
+    only receives "fired <key> <monotonic time>" frames.
+
+    `handler(command, arg)` is called on the connection's thread and
+    returns the reply detail; raising ValueError sends an error reply, and
+    any other exception is logged and reported the same way.
+    """
+
+    def __init__(self, handler, address=DEFAULT_ADDRESS):
+        self.handler = handler
+        self.address = address
+        self.listener = None
+        self.subscribers = []
+        self.subscribers_lock = threading.Lock()
+        self.events = queue.SimpleQueue()
+        self.running = False
+
+    def start(self):
+        """Raises OSError if the address is taken, e.g. by another instance"""
+        if self.running:
+            return
+        # Named pipes refuse a second listener by themselves; a Unix socket
+        # path is only reused when nothing answers on it
+        if not self.address.startswith("\\\\") and os.path.exists(self.address):
+            if _is_live(self.address):
+                raise OSError(f"{self.address} is in use by another instance")
+            os.unlink(self.address)  # Stale socket from a previous run
+        self.listener = Listener(self.address)
+        self.running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._publish_loop, daemon=True).start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.events.put(None)
+        try:
+            self.listener.close()
+        except OSError:
+            pass
+        with self.subscribers_lock:
+            for conn in self.subscribers:
+                conn.close()
+            self.subscribers = []
+
+    def publish_fire(self, key, fired_at):
+        """Queue a fire event for subscribers; safe to call from runner threads"""
+        if self.subscribers:
+            self.events.put(f"fired {key} {fired_at:.6f}".encode("utf-8"))
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        subscribed = False
+        try:
+            while self.running:
+                data = conn.recv_bytes()
+                try:
+                    command, arg = parse_message(data)
+                    if command == "subscribe":
+                        conn.send_bytes(b"ok")
+                        with self.subscribers_lock:
+                            self.subscribers.append(conn)
+                        subscribed = True
+                        return  # The publisher thread owns the connection now
+                    reply = self._reply(command, arg)
+                except ValueError as e:  # Includes frames that aren't UTF-8
+                    reply = f"error {e}"
+                except Exception as e:
+                    # Whatever went wrong, the client still gets its one reply
+                    log.exception("Control command failed")
+                    reply = f"error {type(e).__name__}: {e}"
+                conn.send_bytes(reply.encode("utf-8"))
+        except (EOFError, OSError):
+            pass
+        finally:
+            if not subscribed:
+                conn.close()
+
+    def _reply(self, command, arg):
+        if command == "ping":
+            return "ok"
+        if command not in COMMANDS:
+            return f"error unknown command {command!r}"
+        detail = self.handler(command, arg)
+        return f"ok {detail}" if detail else "ok"
+
+    def _publish_loop(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            with self.subscribers_lock:
+                for conn in list(self.subscribers):
+                    try:
+                        conn.send_bytes(event)
+                    except OSError:
+                        conn.close()
+                        self.subscribers.remove(conn)
+
+
+def _is_live(address):
+    """Whether a server is accepting connections on `address`"""
+    try:
+        Client(address).close()
+    except OSError:
+        return False
+    return True
+
+
+class ControlClient:
+    """Blocking client for ControlServer"""
+
+    def __init__(self, address=DEFAULT_ADDRESS):
+        self.conn = Client(address)
+
+    def request(self, command, arg=""):
+        message = f"{command} {arg}" if arg else command
+        self.conn.send_bytes(message.encode("utf-8"))
+        return self.conn.recv_bytes().decode("utf-8")
+
+    def timed_request(self, command, arg=""):
+        """Send a request and return (reply, round-trip seconds)"""
+        start = time.perf_counter()
+        reply = self.request(command, arg)
+        return reply, time.perf_counter() - start
+
+    def subscribe(self):
+        """Switch to event mode; returns an iterator of (key, fired_at)"""
+        reply = self.request("subscribe")
+        if reply != "ok":
+            raise ConnectionError(reply)
+        return self._events()
+
+    def _events(self):
+        while True:
+            try:
+                event = self.conn.recv_bytes().decode("utf-8")
+            except (EOFError, OSError):
+                return
+            head, _, fired_at = event.rpartition(" ")
+            yield head[len("fired "):], float(fired_at)
+
+    def close(self):
+        self.conn.close()
@@ -1,5 +1,12 @@
+from PySide6.QtCore import QObject, Signal
 from pynput import keyboard
 
+
+# ---------- Thread-safe key capture ----------
+class KeySignal(QObject):
+    captured = Signal(object)
+
+
 def listen_for_single_key(callback):
     def on_press(key):
         try:
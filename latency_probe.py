@@ -0,0 +1,161 @@
+"""End-to-end key injection latency, measured through a loopback listener.
+
+Usage:
+    python latency_probe.py [config.json] [--duration SECONDS] [--macros N] [--xvfb]
+
+Every key the runner injects is matched against the key event the OS
+delivers back to a pynput listener in this process, splitting each fire
+into scheduler lateness (deadline -> inject) and OS delivery latency
+(inject -> observed). With --xvfb the run happens on a private virtual X
+server, so it works on a headless lab machine without touching a desktop.
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+
+from app_config import CONFIG_FILE, read_config
+from benchmark import report
+
+
+MATCH_TIMEOUT = 1.0  # Injections not observed within this many seconds count as lost
+XVFB_DISPLAY = ":99"
+
+
+class LatencyProbe:
+    """Pairs injected presses with observed ones, per key, in order.
+
+    Attach with runner.add_press_listener(probe.on_inject) and feed the
+    listener's presses to on_observed. Keys pressed by anything else
+    (a human typing, say) show up as stray events and are not matched.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(deque)  # Key -> deque of (due, injected_at)
+        self.scheduler = []  # Seconds from deadline to inject
+        self.delivery = []  # Seconds from inject to observed
+        self.total = []  # Seconds from deadline to observed
+        self.lost = 0
+        self.stray = 0
+
+    def on_inject(self, key, due, injected_at):
+        with self.lock:
+            self.pending[key].append((due, injected_at))
+
+    def on_observed(self, key, observed_at):
+        with self.lock:
+            queue = self.pending.get(key)
+            if queue:
+                self._expire(queue, observed_at)
+            if not queue:
+                self.stray += 1
+                return
+            due, injected_at = queue.popleft()
+        self.delivery.append(observed_at - injected_at)
+        if due is not None:
+            self.scheduler.append(injected_at - due)
+            self.total.append(observed_at - due)
+
+    def _expire(self, queue, now):
+        while queue and now - queue[0][1] > MATCH_TIMEOUT:
+            queue.popleft()
+            self.lost += 1
+
+    def finish(self):
+        """Count whatever is still unmatched as lost"""
+        with self.lock:
+            for queue in self.pending.values():
+                self.lost += len(queue)
+                queue.clear()
+
+    def print_report(self):
+        print(f"Matched {len(self.delivery)} presses, {self.lost} lost, {self.stray} stray")
+        for name, samples in (
+            ("deadline -> inject", self.scheduler),
+            ("inject -> observed", self.delivery),
+            ("deadline -> observed", self.total),
+        ):
+            if samples:
+                report(name, samples, unit=1e3, suffix="ms")
+
+
+def start_xvfb(display=XVFB_DISPLAY):
+    """Launch a private Xvfb (with RECORD, which pynput listens through) and
+    point DISPLAY at it. Must run before pynput is imported."""
+    if not shutil.which("Xvfb"):
+        raise SystemExit("Xvfb not found; install it or run against an existing display")
+    server = subprocess.Popen(
+        ["Xvfb", display, "-nolisten", "tcp", "+extension", "RECORD"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    os.environ["DISPLAY"] = display
+    time.sleep(0.5)  # Give the server time to accept connections
+    if server.poll() is not None:
+        raise SystemExit(f"Xvfb exited with status {server.returncode}")
+    return server
+
+
+def probe_macros(args):
+    if args.macros:
+        rng = random.Random(1)
+        keys = "abcdefghijklmnopqrstuvwxyz"
+        return [
+            {"name": f"probe {i}", "key": keys[i % len(keys)], "delay": rng.uniform(0.05, 0.5), "repeat": -1}
+            for i in range(args.macros)
+        ]
+    return [m for m in read_config(args.config)["macros"] if m.get("enabled", True)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config", nargs="?", default=CONFIG_FILE)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--macros", type=int, default=0, help="use N synthetic macros instead of the config")
+    parser.add_argument("--xvfb", action="store_true", help="run on a private virtual X server")
+    args = parser.parse_args(argv)
+
+    server = start_xvfb() if args.xvfb else None
+    try:
+        # Imported late so pynput connects to the display chosen above
+        from pynput import keyboard
+        from macro_runner import MacroRunner
+
+        probe = LatencyProbe()
+
+        def on_press(k):
+            observed_at = time.monotonic()
+            try:
+                key = k.char
+            except AttributeError:
+                key = str(k).replace("Key.", "")
+            if key is not None:
+                probe.on_observed(key, observed_at)
+
+        listener = keyboard.Listener(on_press=on_press)
+        listener.start()
+        listener.wait()
+
+        runner = MacroRunner()
+        runner.add_press_listener(probe.on_inject)
+        runner.start(probe_macros(args))
+        time.sleep(args.duration)
+        runner.stop()
+
+        time.sleep(0.2)  # Let the last events arrive
+        listener.stop()
+        probe.finish()
+        probe.print_report()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import logging
+import os
+import queue
+import threading
+import time
+import traceback
+
+
+LOGGER_NAME = "bdp_macro"
+QUEUE_SIZE = 10000  # Records beyond this are dropped (and counted) rather than block
+BATCH_SIZE = 256  # Records written per file write
+
+
+def get_logger(name):
+    """Logger under the app's namespace; `name` like "runner" or "app" """
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def parse_level(level):
+    """Logging level for a name like "DEBUG" or a number; raises ValueError"""
+    if not isinstance(level, str):
+        return level
+    number = logging.getLevelName(level.upper())
+    if not isinstance(number, int):
+        raise ValueError(f"unknown log level {level!r}")
+    return number
+
+
+class _QueueHandler(logging.Handler):
+    """Hands raw records to the writer thread without formatting them.
+
+    Only a tuple is built on the calling thread; %-formatting, tracebacks
+    and file I/O all happen on the writer.
+    """
+
+    def __init__(self, pipeline):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def emit(self, record):
+        try:
+            self.pipeline.queue.put_nowait((
+                record.created, record.levelname, record.threadName,
+                record.name, record.msg, record.args, record.exc_info,
+            ))
+        except queue.Full:
+            self.pipeline.dropped += 1
+
+    def handle(self, record):
+        # Skip logging.Handler's lock; put_nowait is already thread-safe
+        self.emit(record)
+        return True
+
+
+class LogPipeline:
+    """Background writer batching log records into a size-rotated file"""
+
+    def __init__(self, path, level=logging.INFO, max_bytes=1_000_000, backups=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self.handler = _QueueHandler(self)
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.logger.propagate = False
+        self.set_level(level)
+        self.stream = None
+        self.thread = None
+
+    def set_level(self, level):
+        """Change verbosity at runtime; accepts names like "DEBUG" or numbers"""
+        self.logger.setLevel(parse_level(level))
+
+    def start(self):
+        if self.thread:
+            return
+        self.stream = open(self.path, "a", encoding="utf-8")
+        self.logger.addHandler(self.handler)
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.thread:
+            return
+        self.logger.removeHandler(self.handler)
+        self.queue.put(None)
+        self.thread.join(timeout=2)
+        self.thread = None
+        self.stream.close()
+        self.stream = None
+
+    def _format(self, record):
+        created, level, thread, name, msg, args, exc_info = record
+        try:
+            text = msg % args if args else str(msg)
+        except (TypeError, ValueError):
+            text = f"{msg} {args!r}"
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created))
+        line = f"{stamp}.{int(created % 1 * 1000):03d} {level:<7} [{thread}] {name}: {text}\n"
+        if exc_info:
+            line += "".join(traceback.format_exception(*exc_info))
+        return line
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            done = any(r is None for r in batch)
+            lines = [self._format(r) for r in batch if r is not None]
+            if self.dropped:
+                lines.append(f"{self.dropped} log records dropped, queue was full\n")
+                self.dropped = 0
+            if lines:
+                self.stream.write("".join(lines))
+                self.stream.flush()
+                if self.max_bytes and self.stream.tell() >= self.max_bytes:
+                    self._rollover()
+            if done:
+                return
+
+    def _rollover(self):
+        self.stream.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.stream = open(self.path, "a", encoding="utf-8")
@@ -0,0 +1,370 @@
+"""Run a config.json headless: the scheduler without Qt or a window.
+
+Usage:
+    python macro_daemon.py [config.json] [--idle] [--no-hotkeys] [--no-stdin]
+
+Control it with the configured hotkeys, with one command per line on
+stdin (start, stop, pause, resume, status, reload, loglevel LEVEL, quit),
+with the control socket when "control" is set in the config, or with
+signals: SIGTERM/SIGINT quit, SIGHUP reloads the config and SIGUSR1
+toggles pause.
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+
+from pynput import keyboard
+from pynput.keyboard import GlobalHotKeys
+
+from app_config import CONFIG_FILE, read_config
+from control_server import ControlServer, DEFAULT_ADDRESS
+from log_pipeline import LogPipeline, get_logger, parse_level
+from macro_runner import MacroRunner
+from macro_spec import compile_chains, snapshot
+from metrics_server import MetricsServer
+from phase_planner import plan_offsets
+from reactive_macros import ReactionDispatcher, compile_rules
+from sampling_profiler import SamplingProfiler
+from thread_priority import ThreadTuner, parse_affinity
+
+
+log = get_logger("daemon")
+
+
+def hotkey(key):
+    """GlobalHotKeys spelling of a configured key ("f6" -> "<f6>")"""
+    if key.startswith("f") and len(key) <= 3 and key[1:].isdigit():
+        return f"<{key}>"
+    return key
+
+
+class MacroDaemon:
+    """Owns a MacroRunner and the listeners MacroApp would set up for it.
+
+    Commands may arrive on the stdin, hotkey, signal and control socket
+    threads at once, so they all go through handle() under one lock.
+    """
+
+    def __init__(self, config_path, hotkeys=True):
+        self.config_path = os.path.abspath(config_path)
+        self.directory = os.path.dirname(self.config_path)
+        self.use_hotkeys = hotkeys
+        self.lock = threading.RLock()
+        self.quit_event = threading.Event()
+        self.runner = MacroRunner()
+        self.profiler = SamplingProfiler()
+        self.data = {}
+        self.hotkeys = None
+        self.manual_trigger_listener = None
+        self.reaction_listener = None
+        self.metrics_server = None
+        self.control_server = None
+        self.log_pipeline = None
+
+    # ---------- Config ----------
+    def read(self):
+        """The config file's contents; raises ValueError if unreadable"""
+        try:
+            return read_config(self.config_path)
+        except OSError as e:
+            raise ValueError(f"could not read {self.config_path}: {e}")
+
+    def load(self, data=None):
+        self.data = data if data is not None else self.read()
+        data = self.data
+        self.runner.realtime = data.get("realtime", False)
+        self.runner.watchdog.threshold = data.get("stall_threshold_ms", 20) / 1000.0
+        self.runner.freeze_on_pause = data.get("freeze_on_pause", True)
+        self.runner.resume_stagger = data.get("resume_stagger_ms", 0) / 1000.0
+        self.runner.timing_seed = data.get("timing_seed")
+        self.runner.thread_priority = data.get("thread_priority", "normal")
+        self.runner.cpu_affinity = data.get("cpu_affinity")
+        if self.log_pipeline:
+            self.log_pipeline.set_level(data.get("log_level", "INFO"))
+        if self.use_hotkeys:
+            self.setup_hotkeys()
+
+    def check(self, data):
+        """Raise ValueError for what load() and start() would reject in
+        `data`, without touching the current session"""
+        compile_chains(snapshot(data["macros"]))
+        ThreadTuner(data.get("thread_priority", "normal"), parse_affinity(data.get("cpu_affinity")))
+        parse_level(data.get("log_level", "INFO"))
+
+    def reload(self):
+        data = self.read()
+        self.check(data)  # A bad file leaves the session running as it was
+        previous = self.data
+        was_running = self.runner.running
+        if was_running:
+            self.stop()
+        try:
+            self.load(data)
+            if was_running:
+                self.start()
+        except ValueError:
+            # Something check() can't see, such as a hotkey pynput rejects
+            self.load(previous)
+            if was_running:
+                self.start()
+            raise
+
+    def setup_logging(self):
+        path = os.path.join(self.directory, self.data.get("log_file", "macro.log"))
+        self.log_pipeline = LogPipeline(path, self.data.get("log_level", "INFO"))
+        try:
+            self.log_pipeline.start()
+        except OSError as e:
+            print(f"Logging disabled, could not open {path}: {e}", file=sys.stderr)
+            self.log_pipeline = None
+
+    def setup_servers(self):
+        port = self.data.get("metrics_port")
+        if port:
+            self.metrics_server = MetricsServer(self.runner, port)
+            try:
+                self.metrics_server.start()
+            except OSError as e:
+                log.error("Could not start metrics server on port %s: %s", port, e)
+                self.metrics_server = None
+
+        if self.data.get("control"):
+            address = self.data.get("control_address", DEFAULT_ADDRESS)
+            self.control_server = ControlServer(self.handle_control, address)
+            try:
+                self.control_server.start()
+            except OSError as e:
+                log.error("Could not open control socket %s: %s", address, e)
+                self.control_server = None
+                return
+            self.runner.add_fire_listener(self.control_server.publish_fire)
+
+    # ---------- Listeners ----------
+    def setup_hotkeys(self):
+        if self.hotkeys:
+            self.hotkeys.stop()
+        data = self.data
+        self.hotkeys = GlobalHotKeys({
+            f"<{data.get('start_key', 'f5')}>": lambda: self.run_command("start"),
+            f"<{data.get('pause_key', 'f7')}>": lambda: self.run_command("toggle"),
+            f"<{data.get('stop_key', 'f6')}>": lambda: self.run_command("stop"),
+            f"<{data.get('profile_key', 'f8')}>": lambda: self.run_command("profile_cpu"),
+        })
+        self.hotkeys.start()
+
+    def setup_manual_trigger(self, center_config):
+        def fire(pattern_num):
+            if self.runner.running:
+                self.runner.fire_center_alignment(pattern_num)
+
+        self.manual_trigger_listener = GlobalHotKeys({
+            hotkey(center_config["trigger_key1"]): lambda: fire(1),
+            hotkey(center_config["trigger_key2"]): lambda: fire(2),
+        })
+        self.manual_trigger_listener.start()
+
+    def setup_reactions(self):
+        reactions = self.data.get("reactions")
+        if not reactions:
+            return
+        try:
+            table = compile_rules(reactions)
+        except ValueError as e:
+            log.warning("Reactions disabled: %s", e)
+            return
+        dispatcher = ReactionDispatcher(self.runner, table)
+
+        def on_press(k):
+            try:
+                key = k.char
+            except AttributeError:
+                key = str(k).replace("Key.", "")
+            dispatcher.on_press(key)
+
+        self.reaction_listener = keyboard.Listener(on_press=on_press)
+        self.reaction_listener.start()
+
+    def stop_listeners(self):
+        for listener in (self.manual_trigger_listener, self.reaction_listener):
+            if listener:
+                listener.stop()
+        self.manual_trigger_listener = None
+        self.reaction_listener = None
+
+    # ---------- Commands ----------
+    def start(self):
+        data = self.data
+        macros = data["macros"]
+        center = data["center_alignment"]
+        center_config = center["center_config"]
+        center_enabled = center.get("enabled", True)
+        center_auto = center_enabled and center_config.get("mode", "Auto") == "Auto"
+
+        offsets, center_offset = None, 0.0
+        if data.get("auto_phase", True):
+            enabled = [i for i, m in enumerate(macros) if m.get("enabled", True) and not m.get("after")]
+            # A missing delay is reported by runner.start() below
+            items = [(float(macros[i].get("delay", 0.0)), macros[i].get("repeat", -1), 1) for i in enabled]
+            if center_auto:
+                items.append((center_config["interval"], -1, 2))
+            planned, peak, naive_peak = plan_offsets(items)
+            center_offset = planned.pop() if center_auto else 0.0
+            offsets = [0.0] * len(macros)
+            for i, offset in zip(enabled, planned):
+                offsets[i] = offset
+            log.info("Phase plan: peak %d keys per window (unplanned %d)", peak, naive_peak)
+
+        if center_auto:
+            self.runner.start_with_center(macros, center, offsets, center_offset)
+        else:
+            self.runner.start(macros, offsets)
+        # A restart replaces the previous session's listeners. Done once the
+        # runner has accepted the macros, so a bad config leaves them alone
+        self.stop_listeners()
+        if center_enabled and not center_auto:
+            self.setup_manual_trigger(center_config)
+        self.setup_reactions()
+        log.info("Started %d macros", len(macros))
+
+    def stop(self):
+        self.runner.stop()
+        self.stop_listeners()
+        errors = self.runner.stats.error_count()
+        log.info("Stopped%s", f" with {errors} errors" if errors else "")
+
+    def handle(self, command, arg=""):
+        """Run one command; returns the reply text, raises ValueError"""
+        with self.lock:
+            runner = self.runner
+            if command == "status":
+                return runner.state
+            if command == "start":
+                self.start()
+            elif command == "stop":
+                self.stop()
+            elif command == "pause":
+                if runner.running and not runner.paused:
+                    runner.pause()
+            elif command == "resume":
+                if runner.paused:
+                    runner.resume()
+            elif command == "toggle":
+                return self.handle("resume" if runner.paused else "pause")
+            elif command == "reload":
+                self.reload()
+            elif command == "loglevel":
+                if not self.log_pipeline:
+                    raise ValueError("logging is disabled")
+                self.log_pipeline.set_level(arg)
+                return logging.getLevelName(self.log_pipeline.logger.level)
+            elif command == "profile_cpu":
+                self.toggle_profiler()
+            elif command == "quit":
+                self.quit_event.set()
+            else:
+                raise ValueError(f"unknown command {command!r}")
+            return runner.state
+
+    def run_command(self, command):
+        """handle() for hotkeys, signals and autostart, which have no one
+        to reply to: errors are logged instead of raised"""
+        try:
+            self.handle(command)
+        except ValueError as e:
+            log.error("%s failed: %s", command.capitalize(), e)
+
+    def handle_control(self, command, arg):
+        if command == "ping":
+            return None
+        if command in ("profile", "config"):
+            raise ValueError(f"{command} is only available in the GUI")
+        return self.handle(command, arg)
+
+    def toggle_profiler(self):
+        if not self.profiler.running:
+            self.profiler.start()
+            log.info("Sampling profiler started")
+            return
+        try:
+            path = self.profiler.stop(self.directory)
+        except OSError as e:
+            log.error("Could not write profile to %s: %s", self.directory, e)
+            return
+        log.info("Profile with %d samples written to %s", self.profiler.sample_count, path)
+
+    # ---------- Input ----------
+    def read_stdin(self):
+        for line in sys.stdin:
+            command, _, arg = line.strip().partition(" ")
+            if not command:
+                continue
+            try:
+                reply = self.handle(command.lower(), arg)
+            except ValueError as e:
+                print(f"error {e}", flush=True)
+            else:
+                print(f"ok {reply}", flush=True)
+        # EOF (e.g. stdin is /dev/null under a service manager) is not a quit
+
+    def install_signals(self):
+        handlers = {
+            "SIGTERM": lambda *_: self.quit_event.set(),
+            "SIGINT": lambda *_: self.quit_event.set(),
+            "SIGHUP": lambda *_: self.run_command("reload"),
+            "SIGUSR1": lambda *_: self.run_command("toggle"),
+        }
+        for name, handler in handlers.items():
+            if hasattr(signal, name):  # Windows only has SIGTERM and SIGINT
+                signal.signal(getattr(signal, name), handler)
+
+    def run(self, autostart=True, stdin=True):
+        self.load()
+        self.setup_logging()
+        self.setup_servers()
+        self.install_signals()
+        if autostart:
+            self.run_command("start")
+        if stdin:
+            threading.Thread(target=self.read_stdin, name="stdin", daemon=True).start()
+
+        # Short waits keep the main thread responsive to signals on Windows
+        while not self.quit_event.wait(0.5):
+            pass
+        self.shutdown()
+
+    def shutdown(self):
+        with self.lock:
+            self.stop()
+            if self.hotkeys:
+                self.hotkeys.stop()
+            if self.metrics_server:
+                self.metrics_server.stop()
+            if self.control_server:
+                self.control_server.stop()
+            if self.profiler.running:
+                self.toggle_profiler()
+            if self.log_pipeline:
+                self.log_pipeline.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config", nargs="?", default=CONFIG_FILE)
+    parser.add_argument("--idle", action="store_true", help="wait for a start command instead of starting")
+    parser.add_argument("--no-hotkeys", action="store_true", help="don't install the global hotkeys")
+    parser.add_argument("--no-stdin", action="store_true", help="ignore stdin")
+    args = parser.parse_args(argv)
+
+    daemon = MacroDaemon(args.config, hotkeys=not args.no_hotkeys)
+    try:
+        daemon.run(autostart=not args.idle, stdin=not args.no_stdin)
+    except ValueError as e:  # Only the first load raises; later errors are logged
+        print(f"error {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import csv
+import json
+import os
+
+from activity_schedule import parse_schedule
+from macro_spec import parse_after, parse_jitter
+
+
+FIELDS = ("name", "key", "delay", "repeat", "enabled")
+DEFAULTS = {"name": "", "key": "", "delay": 0.0, "repeat": -1, "enabled": True}
+MAX_DELAY = 1800  # Same bound as the Add/Edit dialogs
+
+
+def export_macros(path, macros):
+    """Write macros to `path` as JSON or CSV, chosen by the file extension"""
+    rows = [{field: m.get(field, DEFAULTS[field]) for field in FIELDS} for m in macros]
+    if _is_csv(path):  # Flat columns only; jitter, schedules and chains are JSON-only
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        for row, m in zip(rows, macros):
+            for field in ("jitter", "schedule", "after"):
+                if m.get(field):
+                    row[field] = m[field]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=4)
+
+
+def import_macros(path):
+    """Read and validate macros from a JSON or CSV file.
+
+    Raises ValueError naming the offending line (CSV) or entry (JSON);
+    nothing is returned unless every entry is valid.
+    """
+    if _is_csv(path):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            missing = {"key", "delay"} - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"line 1: missing column(s) {', '.join(sorted(missing))}")
+            return [parse_entry(row, f"line {reader.line_num}") for row in reader]
+
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {e.lineno}: {e.msg}")
+    if isinstance(data, dict):
+        data = data.get("macros")  # A whole config.json works too
+    if not isinstance(data, list):
+        raise ValueError("expected a list of macros")
+    return [parse_entry(entry, f"entry {i + 1}") for i, entry in enumerate(data)]
+
+
+def parse_entry(raw, where):
+    """One validated macro dict from a JSON object or CSV row"""
+    if not isinstance(raw, dict):
+        raise ValueError(f"{where}: expected an object")
+
+    key = str(raw.get("key") or "").strip()
+    if not key:
+        raise ValueError(f"{where}: key is required")
+    chained = bool(raw.get("after"))
+    if chained and (raw.get("jitter") or raw.get("schedule")):
+        raise ValueError(f"{where}: jitter and schedule don't apply to a macro that follows another")
+    try:
+        delay = raw.get("delay")
+        delay = 0.0 if chained and delay in (None, "") else float(delay)  # Chained macros don't use it
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: delay must be a number, got {raw.get('delay')!r}")
+    if not 0 <= delay <= MAX_DELAY:
+        raise ValueError(f"{where}: delay must be between 0 and {MAX_DELAY} seconds")
+    try:
+        repeat = raw.get("repeat")
+        repeat = -1 if repeat in (None, "") else int(repeat)
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: repeat must be a whole number, got {raw.get('repeat')!r}")
+    if repeat < -1:
+        raise ValueError(f"{where}: repeat must be -1 (loop) or more")
+
+    entry = {
+        "name": str(raw.get("name") or key),
+        "key": key,
+        "delay": delay,
+        "repeat": repeat,
+        "enabled": _parse_bool(raw.get("enabled", True), where),
+    }
+    for field, parse in (("jitter", parse_jitter), ("schedule", parse_schedule), ("after", parse_after)):
+        value = raw.get(field)
+        if value:
+            if not isinstance(value, dict):
+                raise ValueError(f"{where}: {field} must be an object")
+            parse(value, where)
+            entry[field] = value
+    return entry
+
+
+def _parse_bool(value, where):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("", "1", "true", "yes", "y", "on"):
+        return True
+    if text in ("0", "false", "no", "n", "off"):
+        return False
+    raise ValueError(f"{where}: enabled must be true or false, got {value!r}")
+
+
+def _is_csv(path):
+    return os.path.splitext(path)[1].lower() == ".csv"
@@ -1,17 +1,41 @@
+import gc
+import heapq
+import itertools
+import math
 import threading
 import time
 from pynput.keyboard import Controller, Key
-from PySide6.QtCore import QObject, Signal
 
+from log_pipeline import get_logger
+from macro_spec import compile_chains, snapshot
+from runner_stats import RunnerStats
+from stall_watchdog import StallWatchdog
+from thread_priority import ThreadTuner, parse_affinity
 
-class MacroRunner(QObject):
-    tick = Signal(str, float)   # key, seconds remaining
-    fired = Signal(str)
-    stopped = Signal()
-    
-    def __init__(self):
-        super().__init__()
-        self.keyboard = Controller()
+
+# GC thresholds while a real-time session runs. Long-lived objects are
+# frozen at start, so collections are rare and only scan new garbage.
+REALTIME_GC_THRESHOLD = (50000, 50, 1000)
+
+# Offset error (seconds) a chained macro may have before it counts as missed
+CHAIN_BUDGET = 0.001
+
+# One-shot timers sleep until this close to their deadline, then spin.
+# Sleeping all the way overshoots by the OS timer slack.
+TIMER_SPIN = 0.0005
+
+log = get_logger("runner")
+
+
+class MacroRunner:
+    """Schedules and presses macro keys on background threads.
+    
+    Plain callbacks report progress, so the runner works without Qt; the
+    GUI bridges them onto its own thread (see RunnerSignal in main.py).
+    """
+    
+    def __init__(self, keyboard=None):
+        self.keyboard = keyboard or Controller()
         self.stop_event = threading.Event()
         self.pause_event = threading.Event()
         self.threads = []
@@ -19,44 +43,161 @@ class MacroRunner(QObject):
         self.running = False
         self.center_thread = None
         self.center_alternate = True  # Track which pattern to use next in auto mode
+        self.stats = RunnerStats()
+        self.on_tick = None  # Called as on_tick(key, seconds remaining) from runner threads
+        self.on_stopped = None  # Called as on_stopped(session) once a running session's threads are gone
+        self.on_inactive = None  # Called as on_inactive(key, wall time active again) by scheduled macros
+        self.fire_listeners = []  # Called as listener(key, fired_at) from runner threads
+        self.press_listeners = []  # Called as listener(key, due, pressed_at) per injected key
+        self.realtime = False  # Freeze the heap and watch for stalls while running
+        self.thread_priority = "normal"  # "normal", "high" or "realtime" for scheduling threads
+        self.cpu_affinity = None  # CPU number or list of them to pin scheduling threads to
+        self.thread_tuner = ThreadTuner()
+        self.watchdog = StallWatchdog(self.stats)
+        self.saved_gc_threshold = None
+        self.emit_ticks = True  # Cleared while the GUI is hidden
+        self.specs = []  # MacroSpec per macro id; replaced whole on update
+        self.spec_cond = threading.Condition()  # Notified when a spec changes
+        self.deadlines = []  # Session-clock time of the next fire per slot, or None
+        self.deadline_keys = []  # Key shown for each deadline slot
+        self.activations = []  # Per spec id: wall time a scheduled macro wakes, inf if never, None if active
+        self.session_start = 0.0  # Session-clock time of start(), for schedules
+        self.session = 0  # Counts start() calls, so late stop reports can be told apart
+        self.center_slot = 0  # Deadline slot of auto center alignment
+        self.freeze_on_pause = True  # Paused time does not count toward countdowns
+        self.resume_stagger = 0.0  # Seconds over which overdue fires are spread on resume
+        self.paused_at = None
+        self.paused_total = 0.0
+        self.timing_seed = None  # Seeds jittered delays, for reproducible sessions
+        self.delay_streams = []  # DelayStream per spec id for macros with jitter, else None
+        self.stream_refiller = None
+        self.chains = {}  # Parent spec id -> ((child spec id, offset), ...)
+        self.chain_counts = []  # Fires per chained spec id, for their repeat limits
+        self.timers = []  # Heap of (due, seq, key, label, budget, chained spec id or None)
+        self.timer_seq = itertools.count()
+        self.timer_cond = threading.Condition()
+    
+    @property
+    def state(self):
+        if not self.running:
+            return "stopped"
+        return "paused" if self.paused else "running"
     
-    def start(self, macros):
+    def _emit_tick(self, key, remaining):
+        if self.emit_ticks and self.on_tick:
+            self.on_tick(key, remaining)
+    
+    def _emit_fired(self, key):
+        fired_at = time.monotonic()
+        for listener in self.fire_listeners:
+            listener(key, fired_at)
+    
+    def add_fire_listener(self, listener):
+        self.fire_listeners.append(listener)
+    
+    def add_press_listener(self, listener):
+        """Observe every key handed to the OS. `due` is the monotonic time
+        the press was scheduled for (None for manual fires), `pressed_at`
+        when it was handed over."""
+        self.press_listeners.append(listener)
+    
+    def _clock(self):
+        """Monotonic time that stands still while paused (if freeze_on_pause)"""
+        paused_at = self.paused_at
+        if paused_at is not None:
+            return paused_at - self.paused_total
+        return time.monotonic() - self.paused_total
+    
+    def next_activations(self):
+        """Wall time each idle scheduled macro becomes active (inf if never)"""
+        return {
+            spec.key: wall
+            for spec, wall in zip(self.specs, list(self.activations))
+            if wall is not None
+        }
+    
+    def remaining(self):
+        """Seconds left until each macro's next fire"""
+        now = self._clock()
+        return {
+            key: end - now
+            for key, end in zip(self.deadline_keys, list(self.deadlines))
+            if end is not None
+        }
+    
+    def start(self, macros, offsets=None):
+        """Start a thread per macro. `offsets` optionally delays each
+        macro's first countdown (seconds, parallel to `macros`).
+        
+        The macros are snapshotted into MacroSpecs; later edits only reach
+        the runner through update_macro(). Raises ValueError for a malformed
+        macro, before anything is started.
+        """
+        specs = list(snapshot(macros))
+        chains = compile_chains(specs)
+        tuner = ThreadTuner(self.thread_priority, parse_affinity(self.cpu_affinity))
         self.stop()
+        self.session += 1
         self.stop_event.clear()
         self.pause_event.set()
         self.paused = False
         self.running = True
         self.threads = []
+        self.specs = specs
+        self.chains = chains
+        self.chain_counts = [0] * len(specs)
+        self.thread_tuner = tuner
+        self.center_slot = len(self.specs)
+        self.deadlines = [None] * (len(self.specs) + 1)
+        self.deadline_keys = [spec.key for spec in self.specs] + ["_center_"]
+        self.paused_at = None
+        self.paused_total = 0.0
+        self.session_start = self._clock()
+        self.activations = [None] * len(self.specs)
+        self.stats.reset()
         
-        # Start a separate thread for each enabled macro
-        for m in macros:
-            if not m.get("enabled", True):
-                continue
-            
+        self.delay_streams = [None] * len(specs)
+        if any(spec.jitter for spec in specs):
+            from timing_streams import make_streams  # NumPy only loads when jitter is used
+            self.delay_streams, self.stream_refiller = make_streams(specs, self.timing_seed)
+            self.stream_refiller.start()
+        
+        if self.realtime:
+            self._enter_realtime()
+        
+        timer_thread = threading.Thread(target=self._run_timers, daemon=True)
+        timer_thread.start()
+        self.threads.append(timer_thread)
+        
+        # Start a separate thread for each macro; disabled ones sleep until enabled
+        for spec in self.specs:
+            if spec.after:
+                continue  # Fired from its parent's presses, see _fire_chained
             thread = threading.Thread(
                 target=self._run_macro,
-                args=(m,),
+                args=(spec.id, offsets[spec.id] if offsets else 0.0),
                 daemon=True
             )
             thread.start()
             self.threads.append(thread)
     
-    def start_with_center(self, macros, center_config):
+    def start_with_center(self, macros, center_config, offsets=None, center_offset=0.0):
         """Start macros with auto center alignment"""
-        self.start(macros)
+        self.start(macros, offsets)
         self.center_alternate = True  # Reset alternation at start
         
         # Start center alignment in auto mode
         self.center_thread = threading.Thread(
             target=self._run_center_auto,
-            args=(center_config,),
+            args=(center_config, center_offset),
             daemon=True
         )
         self.center_thread.start()
         self.threads.append(self.center_thread)
     
-    def _run_center_auto(self, center_config):
+    def _run_center_auto(self, center_config, offset=0.0):
         """Run center alignment in auto mode"""
+        self._tune_thread()
         try:
             interval = center_config["center_config"]["interval"]
             pattern = center_config["center_config"]["pattern"]
@@ -68,8 +209,10 @@ class MacroRunner(QObject):
                     return
                 
                 # Countdown
-                start = time.monotonic()
-                end = start + interval
+                slot = self.center_slot
+                end = self._clock() + interval + offset
+                offset = 0.0  # Only the first countdown is shifted
+                self.deadlines[slot] = end
                 
                 while True:
                     self.pause_event.wait()
@@ -77,14 +220,15 @@ class MacroRunner(QObject):
                     if self.stop_event.is_set():
                         return
                     
-                    now = time.monotonic()
-                    remaining = end - now
+                    # Re-read the deadline, resume() may have staggered it
+                    end = self.deadlines[slot] or end
+                    remaining = end - self._clock()
                     
                     if remaining <= 0:
                         break
                     
-                    self.tick.emit("_center_", remaining)
-                    time.sleep(0.05)
+                    self._emit_tick("_center_", remaining)
+                    time.sleep(min(0.05, remaining))
                 
                 # Determine which pattern to fire
                 if pattern == "Alternate Both":
@@ -97,11 +241,13 @@ class MacroRunner(QObject):
                     pattern_num = 2
                 
                 # Fire center alignment sequence
-                self._fire_center_sequence(pattern_num)
-                self.fired.emit("_center_")
+                self._fire_center_sequence(pattern_num, end + self.paused_total)
+                self.stats.record_fire("_center_", self._clock() - end, interval)
+                self._emit_fired("_center_")
         
-        except Exception as e:
-            print(f"Error in center alignment auto: {e}")
+        except Exception:
+            self.stats.record_error("center_auto")
+            log.exception("Center alignment auto stopped")
     
     def fire_center_alignment(self, pattern_num=1):
         """Manually trigger center alignment (for manual mode)
@@ -111,55 +257,80 @@ class MacroRunner(QObject):
             return
         
         threading.Thread(target=self._fire_center_sequence, args=(pattern_num,), daemon=True).start()
-        self.fired.emit("_center_")
+        self.stats.record_fire("_center_", 0.0, 0)
+        self._emit_fired("_center_")
     
-    def _fire_center_sequence(self, pattern_num=1):
+    def _fire_center_sequence(self, pattern_num=1, due=None):
         """Execute the center alignment key sequence
         pattern_num: 1 for , → 1ms → .
                      2 for . → 1ms → ,
         """
-        try:
-            if pattern_num == 1:
-                # Press ,
-                self.keyboard.press(',')
-                self.keyboard.release(',')
-                
-                # Wait 1ms
-                time.sleep(0.001)
-                
-                # Press .
-                self.keyboard.press('.')
-                self.keyboard.release('.')
-            else:
-                # Press .
-                self.keyboard.press('.')
-                self.keyboard.release('.')
-                
-                # Wait 1ms
-                time.sleep(0.001)
-                
-                # Press ,
-                self.keyboard.press(',')
-                self.keyboard.release(',')
-        except Exception as e:
-            print(f"Error firing center sequence: {e}")
+        first, second = (',', '.') if pattern_num == 1 else ('.', ',')
+        self._press(first, due)
+        
+        # Wait 1ms
+        time.sleep(0.001)
+        
+        self._press(second, due)
+    
+    def update_macro(self, spec_id, **changes):
+        """Apply an edit from the GUI as a new spec version.
+        
+        `enabled` takes effect immediately; delay and repeat changes apply
+        from the macro's next countdown. Safe to call from any thread.
+        """
+        if not self.running or not 0 <= spec_id < len(self.specs):
+            return
+        with self.spec_cond:
+            self.specs[spec_id] = self.specs[spec_id].replace(**changes)
+            self.spec_cond.notify_all()
     
-    def _run_macro(self, m):
+    def _wait_enabled(self, spec_id):
+        """Block until the macro is enabled again; False if stopping instead"""
+        self.deadlines[spec_id] = None
+        with self.spec_cond:
+            self.spec_cond.wait_for(
+                lambda: self.stop_event.is_set() or self.specs[spec_id].enabled
+            )
+        return not self.stop_event.is_set()
+    
+    def _run_macro(self, spec_id, offset=0.0):
         """Run a single macro in its own thread"""
+        self._tune_thread()
+        specs = self.specs
+        deadlines = self.deadlines
+        stream = self.delay_streams[spec_id]
+        spec = specs[spec_id]
         try:
-            key = m["key"]
-            delay = float(m["delay"])
-            repeat = m["repeat"]
             count = 0
+            active_until = None  # (session time, wall time) the current scheduled stretch ends
             
-            while repeat < 0 or count < repeat:
+            while True:
+                spec = specs[spec_id]
+                if not spec.enabled:
+                    if not self._wait_enabled(spec_id):
+                        return
+                    continue
+                if 0 <= spec.repeat <= count:
+                    deadlines[spec_id] = None
+                    return
+                
                 self.pause_event.wait()
                 
                 if self.stop_event.is_set():
                     return
                 
-                start = time.monotonic()
-                end = start + delay
+                if spec.schedule and (active_until is None or self._stretch_over(active_until)):
+                    active_until = self._wait_active(spec_id)
+                    if active_until is None:
+                        return
+                    continue  # Re-check the spec, it may have changed while idle
+                
+                key = spec.key
+                delay = spec.delay if stream is None else stream.next_delay(spec.delay)
+                end = self._clock() + delay + offset
+                offset = 0.0  # Only the first countdown is shifted
+                deadlines[spec_id] = end
                 
                 # Countdown
                 while True:
@@ -168,40 +339,198 @@ class MacroRunner(QObject):
                     if self.stop_event.is_set():
                         return
                     
-                    now = time.monotonic()
-                    remaining = end - now
+                    # Re-read the deadline, resume() may have staggered it
+                    end = deadlines[spec_id] or end
+                    remaining = end - self._clock()
                     
-                    if remaining <= 0:
+                    if remaining <= 0 or not specs[spec_id].enabled:
                         break
                     
-                    self.tick.emit(key, remaining)
-                    time.sleep(0.05)
+                    self._emit_tick(key, remaining)
+                    time.sleep(min(0.05, remaining))
+                
+                if not specs[spec_id].enabled:
+                    continue  # Disabled mid-countdown, don't fire
+                if active_until is not None and self._stretch_over(active_until):
+                    continue  # Due after its active stretch ended
                 
                 # Fire key ONCE
-                try:
-                    self.keyboard.press(key)
-                    self.keyboard.release(key)
-                except Exception:
-                    pass
+                pressed_at = self._press(key, end + self.paused_total)
+                if pressed_at is not None and spec_id in self.chains:
+                    self._fire_chained(spec_id, pressed_at)
                 
-                self.fired.emit(key)
+                self.stats.record_fire(key, self._clock() - end, delay)
+                self._emit_fired(key)
                 count += 1
         
+        except Exception:
+            self.stats.record_error("macro")
+            log.exception("Macro %r stopped", spec.name or "unknown")
+    
+    def _wait_active(self, spec_id):
+        """Sleep until the macro's schedule lets it fire, with a single timed
+        wait per idle stretch. Returns the (session time, wall time) the
+        active stretch ends, or None when stopping or the macro won't be
+        active again. The spec is re-read on each wakeup, so an edit's
+        schedule applies at once."""
+        while True:
+            spec = self.specs[spec_id]
+            key, schedule = spec.key, spec.schedule
+            if schedule is None:
+                self.activations[spec_id] = None
+                return math.inf, math.inf
+            now = self._clock()
+            wall = time.time()
+            wait = schedule.wait_time(now - self.session_start, wall)
+            if wait == 0:
+                self.activations[spec_id] = None
+                session_left, wall_left = schedule.active_for(now - self.session_start, wall)
+                return now + session_left, wall + wall_left
+            
+            self.deadlines[spec_id] = None
+            self.activations[spec_id] = math.inf if wait is None else wall + wait
+            if self.on_inactive:
+                self.on_inactive(key, self.activations[spec_id])
+            if wait is None:
+                return None
+            
+            with self.spec_cond:
+                self.spec_cond.wait(wait)  # stop() and edits wake it early
+            if self.stop_event.is_set():
+                return None
+    
+    def _stretch_over(self, active_until):
+        """Whether an active stretch from _wait_active has ended, each
+        limit checked against its own clock"""
+        session_end, wall_end = active_until
+        return self._clock() >= session_end or time.time() >= wall_end
+    
+    def _press(self, key, due=None):
+        """Press and release `key`; returns when it was handed over, or None"""
+        pressed_at = time.monotonic()
+        try:
+            self.keyboard.press(key)
+            self.keyboard.release(key)
         except Exception as e:
-            print(f"Error in macro {m.get('name', 'unknown')}: {e}")
+            self.stats.record_error("key_press")
+            log.warning("Failed to press %r: %s", key, e)
+            return None
+        for listener in self.press_listeners:
+            listener(key, due, pressed_at)
+        return pressed_at
+    
+    def _fire_chained(self, spec_id, pressed_at):
+        """Schedule the macros that follow `spec_id`, timed from its press"""
+        for child_id, offset in self.chains[spec_id]:
+            child = self.specs[child_id]
+            if child.enabled and not 0 <= child.repeat <= self.chain_counts[child_id]:
+                self.schedule(offset, child.key, origin=pressed_at, budget=CHAIN_BUDGET, spec_id=child_id)
+    
+    # ---------- One-shot timers ----------
+    def schedule(self, delay, key, label=None, origin=None, budget=None, spec_id=None):
+        """Press `key` once, `delay` seconds after `origin` (monotonic, default
+        now). Lateness is recorded under `label`, counting a miss when it
+        exceeds `budget`. `spec_id` marks a chained macro, whose own
+        followers are scheduled once it fires. Safe to call from any thread."""
+        if not self.running:
+            return
+        due = (time.monotonic() if origin is None else origin) + delay
+        with self.timer_cond:
+            heapq.heappush(self.timers, (due, next(self.timer_seq), key, label or key, budget, spec_id))
+            if self.timers[0][0] == due:
+                self.timer_cond.notify()
+    
+    def _tune_thread(self):
+        """Apply the configured priority and affinity to the calling thread"""
+        if self.thread_tuner.active:
+            self.thread_tuner.apply()
+    
+    def _run_timers(self):
+        self._tune_thread()
+        while True:
+            with self.timer_cond:
+                while True:
+                    if self.stop_event.is_set():
+                        return
+                    if not self.timers:
+                        self.timer_cond.wait()
+                        continue
+                    wait = self.timers[0][0] - time.monotonic()
+                    if wait <= TIMER_SPIN:
+                        break
+                    self.timer_cond.wait(wait - TIMER_SPIN)
+                due, _, key, label, budget, spec_id = heapq.heappop(self.timers)
+            
+            while time.monotonic() < due:
+                pass
+            
+            if self.paused:
+                continue  # Output is suspended; drop rather than fire late
+            if spec_id is not None:
+                spec = self.specs[spec_id]
+                if not spec.enabled or 0 <= spec.repeat <= self.chain_counts[spec_id]:
+                    continue  # Disabled or used up during its offset
+            pressed_at = self._press(key, due)
+            if spec_id is not None and pressed_at is not None:
+                self.chain_counts[spec_id] += 1
+                if spec_id in self.chains:
+                    self._fire_chained(spec_id, pressed_at)
+            self.stats.record_fire(label, time.monotonic() - due, 0, budget)
+            self._emit_fired(label)
+    
+    def _enter_realtime(self):
+        """Move everything allocated so far out of the collector's reach"""
+        gc.collect()
+        gc.freeze()
+        self.saved_gc_threshold = gc.get_threshold()
+        gc.set_threshold(*REALTIME_GC_THRESHOLD)
+        self.watchdog.start()
+    
+    def _leave_realtime(self):
+        self.watchdog.stop()
+        if self.saved_gc_threshold is not None:
+            gc.set_threshold(*self.saved_gc_threshold)
+            self.saved_gc_threshold = None
+            gc.unfreeze()
     
     def pause(self):
         self.paused = True
         self.pause_event.clear()
+        if self.freeze_on_pause and self.paused_at is None:
+            self.paused_at = time.monotonic()
     
     def resume(self):
+        if self.paused_at is not None:
+            self.paused_total += time.monotonic() - self.paused_at
+            self.paused_at = None
+        if self.resume_stagger > 0:
+            self._stagger_overdue()
         self.paused = False
         self.pause_event.set()
     
+    def _stagger_overdue(self):
+        """Spread deadlines that are already due over resume_stagger seconds,
+        oldest first, so they don't all fire in one burst"""
+        now = self._clock()
+        overdue = sorted(
+            (end, slot) for slot, end in enumerate(self.deadlines) if end is not None and end <= now
+        )
+        if len(overdue) < 2:
+            return
+        step = self.resume_stagger / len(overdue)
+        for i, (_, slot) in enumerate(overdue):
+            self.deadlines[slot] = now + i * step
+    
     def stop(self):
+        was_running = self.running
         self.running = False
         self.stop_event.set()
         self.pause_event.set()
+        with self.timer_cond:
+            self.timers = []
+            self.timer_cond.notify_all()
+        with self.spec_cond:
+            self.spec_cond.notify_all()
         
         # Wait for all threads to finish
         for thread in self.threads:
@@ -209,6 +538,13 @@ class MacroRunner(QObject):
                 thread.join(timeout=1)
         
         self.threads = []
+        if self.stream_refiller:
+            self.stream_refiller.stop()
+            self.stream_refiller = None
+        self.deadlines = [None] * len(self.deadlines)
+        self.activations = [None] * len(self.activations)
         self.center_thread = None
         self.center_alternate = True  # Reset alternation
-        self.stopped.emit()
+        self._leave_realtime()
+        if self.on_stopped and was_running:
+            self.on_stopped(self.session)
@@ -0,0 +1,142 @@
+from activity_schedule import parse_schedule
+from reactive_macros import find_cycle
+
+
+JITTER_DISTRIBUTIONS = ("uniform", "normal", "clamped")
+
+
+def parse_jitter(raw, name=""):
+    """A macro's "jitter" entry as (distribution, spread, min_gap) in
+    seconds, or None when absent. Raises ValueError when malformed."""
+    if not raw:
+        return None
+    distribution = raw.get("distribution", "normal")
+    if distribution not in JITTER_DISTRIBUTIONS:
+        raise ValueError(f"{name}: jitter distribution must be one of {', '.join(JITTER_DISTRIBUTIONS)}")
+    try:
+        spread = float(raw.get("spread_ms", 0)) / 1000.0
+        min_gap = float(raw.get("min_gap_ms", 0)) / 1000.0
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: jitter spread_ms and min_gap_ms must be numbers")
+    if spread < 0 or min_gap < 0:
+        raise ValueError(f"{name}: jitter spread_ms and min_gap_ms must not be negative")
+    return (distribution, spread, min_gap)
+
+
+def parse_after(raw, name=""):
+    """A macro's "after" entry as (parent macro name, offset seconds), or
+    None when the macro runs on its own timer"""
+    if not raw:
+        return None
+    parent = raw.get("macro")
+    if not parent:
+        raise ValueError(f"{name}: after needs the name of the macro to follow")
+    try:
+        offset = float(raw.get("offset_ms", 0)) / 1000.0
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: after offset_ms must be a number")
+    if offset < 0:
+        raise ValueError(f"{name}: after offset_ms must not be negative")
+    return (parent, offset)
+
+
+class MacroSpec:
+    """Frozen copy of one macro entry, as seen by the runner.
+
+    The GUI keeps editing its own dicts; the runner only ever reads specs,
+    and changes reach it as whole new specs with a higher `version`
+    (see MacroRunner.update_macro).
+    """
+    __slots__ = ("id", "name", "key", "delay", "repeat", "enabled", "jitter", "schedule", "after", "version")
+
+    def __init__(
+        self, id, name, key, delay, repeat=-1, enabled=True, jitter=None, schedule=None, after=None, version=0
+    ):
+        set_field = object.__setattr__
+        set_field(self, "id", id)
+        set_field(self, "name", name)
+        set_field(self, "key", key)
+        set_field(self, "delay", float(delay))
+        set_field(self, "repeat", int(repeat))
+        set_field(self, "enabled", bool(enabled))
+        set_field(self, "jitter", jitter)  # (distribution, spread, min_gap) or None
+        set_field(self, "schedule", schedule)  # ActivitySchedule or None
+        set_field(self, "after", after)  # (parent name, offset) for chained macros, or None
+        set_field(self, "version", version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MacroSpec is immutable; use replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError("MacroSpec is immutable; use replace()")
+
+    def __repr__(self):
+        return (
+            f"MacroSpec(id={self.id}, key={self.key!r}, delay={self.delay}, "
+            f"repeat={self.repeat}, enabled={self.enabled}, version={self.version})"
+        )
+
+    @classmethod
+    def from_entry(cls, id, entry):
+        """Spec for a macro dict; raises ValueError if it is malformed.
+        Chained macros need no delay; their parent times them."""
+        name = entry.get("name", "")
+        after = parse_after(entry.get("after"), name)
+        if after and (entry.get("jitter") or entry.get("schedule")):
+            raise ValueError(f"{name}: jitter and schedule don't apply to a macro that follows another")
+        if not entry.get("key"):
+            raise ValueError(f"{name}: key is required")
+        if "delay" not in entry and not after:
+            raise ValueError(f"{name}: delay is required")
+        return cls(
+            id,
+            name,
+            entry["key"],
+            entry.get("delay", 0.0),
+            entry.get("repeat", -1),
+            entry.get("enabled", True),
+            parse_jitter(entry.get("jitter"), name),
+            parse_schedule(entry.get("schedule"), name),
+            after,
+        )
+
+    def replace(self, **changes):
+        """A copy with `changes` applied and the version bumped"""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        fields["version"] = self.version + 1
+        return MacroSpec(**fields)
+
+
+def compile_chains(specs):
+    """{parent spec id: ((child spec id, offset), ...)} for chained specs.
+
+    Raises ValueError when a parent is missing or ambiguous, or when
+    macros follow each other in a loop.
+    """
+    ids = {}
+    for spec in specs:
+        ids.setdefault(spec.name, []).append(spec.id)
+
+    chains = {}
+    edges = {}
+    for spec in specs:
+        if not spec.after:
+            continue
+        parent, offset = spec.after
+        matches = ids.get(parent, [])
+        if len(matches) != 1:
+            problem = "no macro" if not matches else "more than one macro"
+            raise ValueError(f"{spec.name}: follows {parent!r}, but {problem} has that name")
+        chains.setdefault(matches[0], []).append((spec.id, offset))
+        edges.setdefault(parent, set()).add(spec.name)
+
+    cycle = find_cycle(edges)
+    if cycle:
+        raise ValueError("macros follow each other in a loop: " + " -> ".join(cycle))
+    return {parent: tuple(children) for parent, children in chains.items()}
+
+
+def snapshot(macros):
+    """Freeze a list of macro dicts into specs, ids being list positions"""
+    return tuple(MacroSpec.from_entry(i, m) for i, m in enumerate(macros))
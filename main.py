@@ -1,4 +1,9 @@
+import math
+import time
+STARTED_AT = time.perf_counter()  # Taken before the heavy imports, for the startup report
+
 import json
+import os
 import threading
 import ctypes
 import sys
@@ -7,213 +12,170 @@ from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QListWidget, QListWidgetItem,
     QLabel, QInputDialog, QMessageBox, QCheckBox, QLineEdit,
-    QDialog, QComboBox, QDoubleSpinBox
+    QSystemTrayIcon, QMenu, QFileDialog
 )
-from PySide6.QtCore import QObject, Signal, Qt, QSize
-from PySide6.QtGui import QIcon, QPixmap
+from PySide6.QtCore import QObject, Signal, Qt, QSize, QTimer, QEvent, QPoint
+from PySide6.QtGui import QIcon
 
 from pynput import keyboard
 from pynput.keyboard import GlobalHotKeys
 
+from app_config import CONFIG_FILE, default_center_alignment
+from control_server import ControlServer, DEFAULT_ADDRESS
+from key_listener import KeySignal
+from log_pipeline import LogPipeline, get_logger, parse_level
+from macro_io import export_macros, import_macros
 from macro_runner import MacroRunner
-from settings_dialog import SettingsDialog
+from metrics_server import MetricsServer
+from phase_planner import PLAN_WINDOW, plan_offsets
+from reactive_macros import ReactionDispatcher, compile_rules
+from sampling_profiler import SamplingProfiler
+from startup_timing import StartupTimer
+
+
+log = get_logger("app")
+startup = StartupTimer(STARTED_AT)
+startup.mark("import")
 
 
 # ---------- Windows App ID ----------
 APP_ID = "MacroEditor.App"
-ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(APP_ID)
+if sys.platform == "win32":
+    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(APP_ID)
 
-CONFIG_FILE = "config.json"
 
+# ---------- Thread-safe runner events ----------
+class RunnerSignal(QObject):
+    """Re-emits the runner's thread callbacks as queued Qt signals"""
+    tick = Signal(str, float)   # key, seconds remaining
+    fired = Signal(str)
+    inactive = Signal(str, float)  # key, wall time it becomes active (inf: never)
+    stopped = Signal(int)  # session that ended
 
-# ---------- Thread-safe key capture ----------
-class KeySignal(QObject):
-    captured = Signal(object)
+    def __init__(self, runner):
+        super().__init__()
+        self.stats = runner.stats
+        runner.on_tick = self.emit_tick
+        runner.on_inactive = self.emit_inactive
+        runner.on_stopped = self.stopped.emit
+        runner.add_fire_listener(self.emit_fired)
 
+    def emit_tick(self, key, remaining):
+        self.stats.note_emit()
+        self.tick.emit(key, remaining)
+
+    def emit_fired(self, key, fired_at):
+        self.stats.note_emit()
+        self.fired.emit(key)
+
+    def emit_inactive(self, key, wall):
+        self.stats.note_emit()
+        self.inactive.emit(key, wall)
+
+
+# ---------- Thread-safe control commands ----------
+class ControlSignal(QObject):
+    command = Signal(str, str)
+
+
+# ---------- Thread-safe warnings ----------
+class WarningSignal(QObject):
+    """Carries warnings from hotkey threads to a message box on the GUI thread"""
+    raised = Signal(str, str)  # title, text
 
-# ---------- Center Alignment Edit Dialog ----------
-class CenterAlignmentDialog(QDialog):
-    def __init__(self, center_config, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Edit Center Alignment")
-        self.setMinimumSize(400, 350)
-        
-        self.setStyleSheet("""
-            QDialog { background-color: #1e1e1e; color: #ffffff; }
-            QLabel { color: #dddddd; padding: 2px; }
-            QComboBox, QDoubleSpinBox {
-                background-color: #2a2a2a;
-                color: #ffffff;
-                padding: 8px;
-                border-radius: 6px;
-                border: 1px solid #3a3a3a;
-            }
-            QPushButton {
-                background-color: #3a3a3a;
-                color: #ffffff;
-                border-radius: 6px;
-                padding: 10px 20px;
-            }
-            QPushButton:hover { background-color: #505050; }
-        """)
-        
-        layout = QVBoxLayout(self)
-        layout.setSpacing(16)
-        layout.setContentsMargins(20, 20, 20, 20)
-        
-        # Title
-        title = QLabel("Center Alignment Macro")
-        title.setStyleSheet("font-size: 16px; font-weight: bold; color: white;")
-        layout.addWidget(title)
-        
-        desc = QLabel("Presses: Left (,) → 1ms → Right (.) or Right (.) → 1ms → Left (,)")
-        desc.setStyleSheet("font-size: 12px; color: #888;")
-        layout.addWidget(desc)
-        
-        # Mode selection
-        mode_label = QLabel("Mode:")
-        mode_label.setStyleSheet("font-weight: bold;")
-        layout.addWidget(mode_label)
-        
-        self.mode_combo = QComboBox()
-        self.mode_combo.addItems(["Auto", "Manual"])
-        self.mode_combo.setCurrentText(center_config.get("mode", "Auto"))
-        self.mode_combo.currentTextChanged.connect(self.on_mode_changed)
-        layout.addWidget(self.mode_combo)
-        
-        # Manual keybinds
-        self.manual_label = QLabel("Trigger Keys:")
-        self.manual_label.setStyleSheet("font-weight: bold;")
-        layout.addWidget(self.manual_label)
-        
-        manual_layout = QHBoxLayout()
-        
-        left_layout = QVBoxLayout()
-        left_layout.addWidget(QLabel("Left Right"))
-        self.key1_btn = QPushButton(center_config.get("trigger_key1", "f").upper())
-        self.key1_btn.clicked.connect(lambda: self.capture_key(1))
-        left_layout.addWidget(self.key1_btn)
-        
-        right_layout = QVBoxLayout()
-        right_layout.addWidget(QLabel("Right Left"))
-        self.key2_btn = QPushButton(center_config.get("trigger_key2", "g").upper())
-        self.key2_btn.clicked.connect(lambda: self.capture_key(2))
-        right_layout.addWidget(self.key2_btn)
-        
-        manual_layout.addLayout(left_layout)
-        manual_layout.addLayout(right_layout)
-        
-        self.manual_widget = QWidget()
-        self.manual_widget.setLayout(manual_layout)
-        layout.addWidget(self.manual_widget)
-        
-        # Auto settings
-        self.auto_label = QLabel("Auto Settings:")
-        self.auto_label.setStyleSheet("font-weight: bold;")
-        layout.addWidget(self.auto_label)
-        
-        auto_layout = QVBoxLayout()
-        
-        pattern_label = QLabel("Pattern:")
-        auto_layout.addWidget(pattern_label)
-        
-        self.pattern_combo = QComboBox()
-        self.pattern_combo.addItems(["Alternate Both", "Only Left Right", "Only Right Left"])
-        self.pattern_combo.setCurrentText(center_config.get("pattern", "Alternate Both"))
-        auto_layout.addWidget(self.pattern_combo)
-        
-        interval_label = QLabel("Interval (seconds):")
-        auto_layout.addWidget(interval_label)
-        
-        self.interval_spin = QDoubleSpinBox()
-        self.interval_spin.setRange(0.1, 1800)
-        self.interval_spin.setDecimals(2)
-        self.interval_spin.setValue(center_config.get("interval", 1.0))
-        auto_layout.addWidget(self.interval_spin)
-        
-        self.auto_widget = QWidget()
-        self.auto_widget.setLayout(auto_layout)
-        layout.addWidget(self.auto_widget)
-        
-        layout.addStretch()
-        
-        # Buttons
-        btn_layout = QHBoxLayout()
-        btn_layout.addStretch()
-        
-        save_btn = QPushButton("Save")
-        save_btn.clicked.connect(self.accept)
-        btn_layout.addWidget(save_btn)
-        
-        layout.addLayout(btn_layout)
-        
-        self.on_mode_changed(self.mode_combo.currentText())
-        
-        self.key_signal = KeySignal()
-        self.key_signal.captured.connect(self.on_key_captured)
-        self.capturing_key = None
-    
-    def on_mode_changed(self, mode):
-        is_manual = mode == "Manual"
-        self.manual_label.setVisible(is_manual)
-        self.manual_widget.setVisible(is_manual)
-        self.auto_label.setVisible(not is_manual)
-        self.auto_widget.setVisible(not is_manual)
-    
-    def capture_key(self, key_num):
-        self.capturing_key = key_num
-        QMessageBox.information(self, "Capture Key", "Press a key")
-        
-        def listen():
-            def on_press(k):
-                try:
-                    key = k.char
-                except AttributeError:
-                    key = str(k).replace("Key.", "")
-                self.key_signal.captured.emit(key)
-                return False
-            
-            with keyboard.Listener(on_press=on_press) as l:
-                l.join()
-        
-        threading.Thread(target=listen, daemon=True).start()
-    
-    def on_key_captured(self, key):
-        if self.capturing_key == 1:
-            self.key1_btn.setText(key.upper())
-        elif self.capturing_key == 2:
-            self.key2_btn.setText(key.upper())
-        self.capturing_key = None
-    
-    def get_config(self):
-        return {
-            "mode": self.mode_combo.currentText(),
-            "trigger_key1": self.key1_btn.text().lower(),
-            "trigger_key2": self.key2_btn.text().lower(),
-            "pattern": self.pattern_combo.currentText(),
-            "interval": self.interval_spin.value()
-        }
+
+# ---------- Thread-safe status ----------
+class StatusSignal(QObject):
+    """Carries status text from hotkey threads to the status label"""
+    changed = Signal(str)
+    refresh = Signal()  # Same text, the profiler was toggled
 
 
 # ---------- Row Widget ----------
+# Styles for every MacroRow, parsed once on the list instead of per row.
+# Parts are told apart by objectName and the "center"/"counting" properties.
+ROW_STYLE = """
+    MacroRow {
+        background-color: #2d2d2d;
+        border-radius: 10px;
+        margin: 2px;
+    }
+    MacroRow:hover { background-color: #353535; }
+    MacroRow[center="true"] { background-color: #2d3d2d; }
+    MacroRow[center="true"]:hover { background-color: #354535; }
+    MacroRow QCheckBox::indicator {
+        width: 20px;
+        height: 20px;
+        border-radius: 4px;
+        border: 2px solid #555;
+        background-color: #2a2a2a;
+    }
+    MacroRow QCheckBox::indicator:checked {
+        background-color: #4a9eff;
+        border-color: #4a9eff;
+    }
+    MacroRow QCheckBox::indicator:hover {
+        border-color: #4a9eff;
+    }
+    QLabel#keyLabel {
+        background-color: #4a9eff;
+        color: white;
+        font-weight: bold;
+        border-radius: 6px;
+        padding: 6px 10px;
+        font-size: 13px;
+    }
+    MacroRow[center="true"] QLabel#keyLabel {
+        background-color: #5a9e5a;
+        font-size: 16px;
+    }
+    QLabel#nameLabel { color: #ffffff; font-size: 14px; font-weight: 500; }
+    QLabel#infoLabel {
+        color: #999;
+        background-color: #252525;
+        border-radius: 6px;
+        padding: 4px 10px;
+        font-size: 12px;
+    }
+    QLabel#timerLabel {
+        color: #9adfff;
+        background-color: #1a3a4a;
+        border-radius: 6px;
+        padding: 4px 10px;
+        font-weight: bold;
+        min-width: 70px;
+        font-size: 12px;
+    }
+    QLabel#timerLabel[counting="true"] {
+        color: #ffaa00;
+        background-color: #3a2a1a;
+    }
+    QPushButton#editButton {
+        background-color: #3a3a3a;
+        border-radius: 8px;
+        border: none;
+        font-size: 18px;
+        padding: 2px;
+    }
+    QPushButton#editButton:hover {
+        background-color: #4a9eff;
+    }
+    QPushButton#editButton:pressed {
+        background-color: #3a7fd5;
+    }
+"""
+
+
 class MacroRow(QWidget):
-    def __init__(self, entry, edit_callback, is_center=False):
-        super().__init__()
+    """One macro in the list; styled by ROW_STYLE on the list widget"""
+
+    def __init__(self, entry, edit_callback, is_center=False, toggle_callback=None, parent=None):
+        super().__init__(parent)
         self.entry = entry
         self.is_center = is_center
-        
-        # Rounded background styling
-        bg_color = "#2d3d2d" if is_center else "#2d2d2d"
-        self.setStyleSheet(f"""
-            MacroRow {{
-                background-color: {bg_color};
-                border-radius: 10px;
-                margin: 2px;
-            }}
-            MacroRow:hover {{
-                background-color: {"#354535" if is_center else "#353535"};
-            }}
-        """)
+        self.toggle_callback = toggle_callback
+        self.counting = False
+        self.setProperty("center", is_center)
 
         layout = QHBoxLayout(self)
         layout.setContentsMargins(12, 10, 12, 10)
@@ -222,50 +184,14 @@ class MacroRow(QWidget):
         self.enabled = QCheckBox()
         self.enabled.setChecked(entry.get("enabled", True))
         self.enabled.stateChanged.connect(self.toggle)
-        self.enabled.setStyleSheet("""
-            QCheckBox::indicator {
-                width: 20px;
-                height: 20px;
-                border-radius: 4px;
-                border: 2px solid #555;
-                background-color: #2a2a2a;
-            }
-            QCheckBox::indicator:checked {
-                background-color: #4a9eff;
-                border-color: #4a9eff;
-            }
-            QCheckBox::indicator:hover {
-                border-color: #4a9eff;
-            }
-        """)
 
-        if is_center:
-            self.key_lbl = QLabel("⚙️")
-            self.key_lbl.setMinimumWidth(45)
-            self.key_lbl.setAlignment(Qt.AlignCenter)
-            self.key_lbl.setStyleSheet("""
-                background-color: #5a9e5a;
-                color: white;
-                font-weight: bold;
-                border-radius: 6px;
-                padding: 6px 10px;
-                font-size: 16px;
-            """)
-        else:
-            self.key_lbl = QLabel(entry["key"].upper())
-            self.key_lbl.setMinimumWidth(45)
-            self.key_lbl.setAlignment(Qt.AlignCenter)
-            self.key_lbl.setStyleSheet("""
-                background-color: #4a9eff;
-                color: white;
-                font-weight: bold;
-                border-radius: 6px;
-                padding: 6px 10px;
-                font-size: 13px;
-            """)
+        self.key_lbl = QLabel("⚙️" if is_center else entry["key"].upper())
+        self.key_lbl.setObjectName("keyLabel")
+        self.key_lbl.setMinimumWidth(45)
+        self.key_lbl.setAlignment(Qt.AlignCenter)
         
         self.name_lbl = QLabel(entry["name"])
-        self.name_lbl.setStyleSheet("color: #ffffff; font-size: 14px; font-weight: 500;")
+        self.name_lbl.setObjectName("nameLabel")
 
         # Info label
         if is_center:
@@ -287,46 +213,25 @@ class MacroRow(QWidget):
         else:
             repeat = entry.get("repeat", -1)
             rep = "Loop" if repeat < 0 else f"x{repeat}"
-            self.info_lbl = QLabel(f'{entry["delay"]:.2f}s | {rep}')
+            after = entry.get("after")
+            jitter = entry.get("jitter")
+            spread = f' ±{jitter.get("spread_ms", 0):.0f}ms' if jitter else ""
+            if after:
+                timing = f'after {after.get("macro", "?")} +{after.get("offset_ms", 0):.0f}ms'
+            else:
+                timing = f'{entry["delay"]:.2f}s{spread}'
+            self.info_lbl = QLabel(f'{timing} | {rep}')
         
-        self.info_lbl.setStyleSheet("""
-            color: #999;
-            background-color: #252525;
-            border-radius: 6px;
-            padding: 4px 10px;
-            font-size: 12px;
-        """)
+        self.info_lbl.setObjectName("infoLabel")
         self.info_lbl.setMinimumWidth(120)
 
         self.timer_lbl = QLabel("Ready")
-        self.timer_lbl.setStyleSheet("""
-            color: #9adfff;
-            background-color: #1a3a4a;
-            border-radius: 6px;
-            padding: 4px 10px;
-            font-weight: bold;
-            min-width: 70px;
-            font-size: 12px;
-        """)
+        self.timer_lbl.setObjectName("timerLabel")
         self.timer_lbl.setAlignment(Qt.AlignCenter)
 
         self.edit_btn = QPushButton("✏️")
+        self.edit_btn.setObjectName("editButton")
         self.edit_btn.setFixedSize(42, 38)
-        self.edit_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3a3a3a;
-                border-radius: 8px;
-                border: none;
-                font-size: 18px;
-                padding: 2px;
-            }
-            QPushButton:hover {
-                background-color: #4a9eff;
-            }
-            QPushButton:pressed {
-                background-color: #3a7fd5;
-            }
-        """)
         self.edit_btn.clicked.connect(lambda: edit_callback(entry))
 
         layout.addWidget(self.enabled)
@@ -338,30 +243,32 @@ class MacroRow(QWidget):
 
     def toggle(self, state):
         self.entry["enabled"] = bool(state)
+        if self.toggle_callback:
+            self.toggle_callback(self.entry)
 
     def update_timer(self, seconds):
         self.timer_lbl.setText(f"{seconds:0.1f}s")
-        self.timer_lbl.setStyleSheet("""
-            color: #ffaa00;
-            background-color: #3a2a1a;
-            border-radius: 6px;
-            padding: 4px 10px;
-            font-weight: bold;
-            min-width: 70px;
-            font-size: 12px;
-        """)
+        self.set_counting(True)
 
     def reset_timer(self):
         self.timer_lbl.setText("Ready")
-        self.timer_lbl.setStyleSheet("""
-            color: #9adfff;
-            background-color: #1a3a4a;
-            border-radius: 6px;
-            padding: 4px 10px;
-            font-weight: bold;
-            min-width: 70px;
-            font-size: 12px;
-        """)
+        self.set_counting(False)
+
+    def show_activation(self, wall):
+        """Idle under its schedule until `wall` (inf: not again this session)"""
+        text = "Done" if wall == math.inf else time.strftime("at %H:%M", time.localtime(wall))
+        self.timer_lbl.setText(text)
+        self.set_counting(False)
+
+    def set_counting(self, counting):
+        """Switch the timer colors; only re-polishes when the state changes"""
+        if counting == self.counting:
+            return
+        self.counting = counting
+        self.timer_lbl.setProperty("counting", counting)
+        style = self.timer_lbl.style()
+        style.unpolish(self.timer_lbl)
+        style.polish(self.timer_lbl)
     
     def refresh_info(self):
         if self.is_center:
@@ -386,8 +293,13 @@ class MacroRow(QWidget):
 class MacroApp(QWidget):
     def __init__(self):
         super().__init__()
+        startup.mark("qt init")
         self.setWindowTitle("Macro Editor")
-        self.setWindowIcon(QIcon("icon.ico"))
+        # Decode icon.ico once; the header reuses the app icon's pixmap
+        app_icon = QApplication.windowIcon()
+        if app_icon.isNull():
+            app_icon = QIcon("icon.ico")
+        self.setWindowIcon(app_icon)
         self.resize(750, 470)
 
         self.setStyleSheet("""
@@ -412,33 +324,60 @@ class MacroApp(QWidget):
         """)
 
         self.macros = []
-        self.center_alignment = {
-            "name": "Center Alignment",
-            "enabled": True,
-            "is_center": True,
-            "center_config": {
-                "mode": "Auto",
-                "trigger_key1": "f",
-                "trigger_key2": "g",
-                "pattern": "Alternate Both",
-                "interval": 1.0
-            }
-        }
+        self.center_alignment = default_center_alignment()
         self.rows = {}
 
         self.start_key = "f5"
         self.stop_key = "f6"
         self.pause_key = "f7"
+        self.profile_key = "f8"  # Toggles the sampling profiler
+        self.profiler = SamplingProfiler()
+        self.metrics_port = None  # Set in config.json to serve stats on localhost
+        self.metrics_server = None
+        self.profiles = {}  # name -> {"macros": [...], "center_alignment": {...}}
+        self.control_enabled = False
+        self.control_address = DEFAULT_ADDRESS
+        self.control_server = None
+        self.realtime = False
+        self.stall_threshold_ms = 20
+        self.thread_priority = "normal"  # Or "high"/"realtime" for the runner's threads
+        self.cpu_affinity = None  # CPU number or list to pin the runner's threads to
+        self.heartbeat_timer = None
+        self.freeze_on_pause = True
+        self.resume_stagger_ms = 0
+        self.auto_phase = True  # Spread macro start times to avoid collisions
+        self.timing_seed = None  # Makes jittered delays reproducible when set
+        self.run_status = "Running"
+        self.rendering = True  # False while the window is hidden or minimized
+        self.use_tray = False
+        self.tray = None
+        self.startup_budget_ms = 1000  # First paint later than this logs a warning
+        self.started_up = False
+        self.row_size_hint = None
 
         self.runner = MacroRunner()
-        self.runner.tick.connect(self.on_tick)
-        self.runner.fired.connect(self.on_fired)
-        self.runner.stopped.connect(self.on_stopped)
+        self.runner_signal = RunnerSignal(self.runner)
+        self.runner_signal.tick.connect(self.on_tick)
+        self.runner_signal.fired.connect(self.on_fired)
+        self.runner_signal.inactive.connect(self.on_inactive)
+        self.runner_signal.stopped.connect(self.on_stopped)
 
         self.key_signal = KeySignal()
         self.key_signal.captured.connect(self.on_key_captured)
+        self.warning_signal = WarningSignal()
+        self.warning_signal.raised.connect(self.show_warning)
+        self.status_text = "Stopped"  # Without the profiling suffix
+        self.status_signal = StatusSignal()
+        self.status_signal.changed.connect(self.show_status)
+        self.status_signal.refresh.connect(lambda: self.show_status(self.status_text))
         
         self.manual_trigger_listener = None
+        self.reactions = []  # Key-triggered rules, see reactive_macros
+        self.running_macros = []  # Entries of the running session, by spec id
+        self.log_level = "INFO"
+        self.log_file = "macro.log"  # Relative to config.json's folder
+        self.log_pipeline = None
+        self.reaction_listener = None
 
         layout = QVBoxLayout(self)
 
@@ -447,7 +386,7 @@ class MacroApp(QWidget):
         header.setSpacing(6)
 
         icon = QLabel()
-        icon.setPixmap(QPixmap("icon.ico").scaled(26, 26, Qt.KeepAspectRatio))
+        icon.setPixmap(app_icon.pixmap(26, 26))
         title = QLabel("BDP Macro")
         title.setStyleSheet("font-size:20px; font-weight:bold;")
 
@@ -464,13 +403,20 @@ class MacroApp(QWidget):
 
         # ---------- LIST ----------
         self.list_widget = QListWidget()
+        self.list_widget.setStyleSheet(ROW_STYLE)
+        self.list_widget.verticalScrollBar().valueChanged.connect(self.materialize_rows)
         layout.addWidget(self.list_widget)
+        self.row_entries = []
+        self.row_tooltips = {}  # Row key -> start offset text, kept for rows created later
 
         # ---------- BUTTONS ----------
         btns = QHBoxLayout()
         self.add_btn = QPushButton("Add")
         self.remove_btn = QPushButton("Remove")
         self.settings_btn = QPushButton("Settings")
+        self.import_btn = QPushButton("Import")
+        self.export_btn = QPushButton("Export")
+        self.batch_btn = QPushButton("Batch Edit")
         
         self.credits = QLabel("Created by Big_eyes101")
         self.credits.setStyleSheet("color: #888888; font-size: 12px;")
@@ -483,6 +429,9 @@ class MacroApp(QWidget):
         btns.addWidget(self.add_btn)
         btns.addWidget(self.remove_btn)
         btns.addWidget(self.settings_btn)
+        btns.addWidget(self.import_btn)
+        btns.addWidget(self.export_btn)
+        btns.addWidget(self.batch_btn)
         btns.addStretch()
         btns.addWidget(self.credits)
         btns.addStretch()
@@ -495,84 +444,309 @@ class MacroApp(QWidget):
         self.add_btn.clicked.connect(self.add_key)
         self.remove_btn.clicked.connect(self.remove_selected)
         self.settings_btn.clicked.connect(self.open_settings)
+        self.import_btn.clicked.connect(self.import_file)
+        self.export_btn.clicked.connect(self.export_file)
+        self.batch_btn.clicked.connect(self.batch_edit)
         self.start_btn.clicked.connect(self.start_macro)
         self.pause_btn.clicked.connect(self.pause_macro)
         self.stop_btn.clicked.connect(self.stop_macro)
 
+        startup.mark("build")
         self.load_config()
+        self.setup_logging()
         self.update_buttons()
+        self.configure_runner()
+        startup.mark("config load")
+        # Hooks, sockets and the tray wait until the window has painted
+        QTimer.singleShot(2000, self.finish_startup)  # In case no paint ever comes
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.started_up:
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        if self.started_up:
+            return
+        self.started_up = True
+        startup.mark("first paint")
         self.setup_hotkeys()
+        self.setup_metrics()
+        self.setup_control()
+        self.setup_tray()
+        startup.report(self.startup_budget_ms / 1000.0)
 
     # ---------- TIMER SIGNALS ----------
     def on_tick(self, key, seconds):
-        if key in self.rows:
+        self.runner.stats.note_delivered()
+        if self.rendering and key in self.rows:
             self.rows[key].update_timer(seconds)
 
     def on_fired(self, key):
-        if key in self.rows:
+        self.runner.stats.note_delivered()
+        if self.rendering and key in self.rows:
             self.rows[key].reset_timer()
 
-    def on_stopped(self):
+    def on_inactive(self, key, wall):
+        self.runner.stats.note_delivered()
+        if self.rendering and key in self.rows:
+            self.rows[key].show_activation(wall)
+
+    def on_stopped(self, session):
+        if session != self.runner.session:
+            return  # A restart already replaced that session and its listeners
         for row in self.rows.values():
             row.reset_timer()
-        self.status.setText("Stopped")
+        self.set_status(self.stopped_status())
         self.stop_manual_trigger()
+        self.stop_reactions()
+
+    # ---------- VISIBILITY ----------
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            if self.isMinimized():
+                self.set_rendering(False)
+                if self.tray:
+                    QTimer.singleShot(0, self.hide)
+            elif self.isVisible():
+                self.set_rendering(True)
+        super().changeEvent(event)
+
+    def hideEvent(self, event):
+        self.set_rendering(False)
+        super().hideEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        QTimer.singleShot(0, self.materialize_rows)  # After the list has its new size
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        QTimer.singleShot(0, self.materialize_rows)
+        if not self.isMinimized():
+            self.set_rendering(True)
+
+    def set_rendering(self, enabled):
+        """Stop countdown updates while nobody can see them"""
+        if enabled == self.rendering:
+            return
+        self.rendering = enabled
+        self.runner.emit_ticks = enabled
+        if enabled:
+            self.catch_up_timers()
+
+    def catch_up_timers(self):
+        """Repaint every countdown once from the runner's current deadlines"""
+        running = self.runner.running
+        remaining = self.runner.remaining() if running else {}
+        activations = self.runner.next_activations() if running else {}
+        for key, row in self.rows.items():
+            self.sync_row(key, row, remaining, activations)
+
+    def sync_row(self, key, row, remaining, activations):
+        """Show the row's countdown, or its next activation while idle"""
+        if key in activations:
+            row.show_activation(activations[key])
+        elif remaining.get(key, 0) > 0:
+            row.update_timer(remaining[key])
+        else:
+            row.reset_timer()
+
+    def setup_tray(self):
+        if not self.use_tray or not QSystemTrayIcon.isSystemTrayAvailable():
+            return
+        self.tray = QSystemTrayIcon(self.windowIcon(), self)
+        self.tray.setToolTip("BDP Macro")
+        menu = QMenu(self)
+        menu.addAction("Show", self.restore_from_tray)
+        menu.addAction("Start", self.start_macro)
+        menu.addAction("Pause / Resume", self.pause_macro)
+        menu.addAction("Stop", self.stop_macro)
+        menu.addAction("Start / Stop Profiler", self.toggle_profiler)
+        menu.addSeparator()
+        menu.addAction("Quit", self.close)
+        self.tray.setContextMenu(menu)
+        self.tray.activated.connect(self.on_tray_activated)
+        self.tray.show()
+
+    def on_tray_activated(self, reason):
+        if reason == QSystemTrayIcon.Trigger:
+            self.restore_from_tray()
+
+    def restore_from_tray(self):
+        self.showNormal()
+        self.activateWindow()
 
     # ---------- LIST ----------
     def refresh_list(self):
+        """Rebuild the list. Row widgets are only created for rows scrolled
+        into view (see materialize_rows), so large macro sets stay cheap."""
         self.list_widget.clear()
         self.rows.clear()
-
-        # Add center alignment first
-        item = QListWidgetItem()
-        row = MacroRow(self.center_alignment, self.edit_center_alignment, is_center=True)
-        self.rows["_center_"] = row
-        size_hint = row.sizeHint()
-        item.setSizeHint(size_hint + QSize(0, 8))
-        self.list_widget.addItem(item)
-        self.list_widget.setItemWidget(item, row)
-
-        # Add regular macros
-        for m in self.macros:
+        self.row_entries = [self.center_alignment] + self.macros
+
+        # Every row has the same layout, so one styled row sizes them all
+        if self.row_size_hint is None:
+            probe = MacroRow(self.center_alignment, None, is_center=True, parent=self.list_widget.viewport())
+            probe.hide()
+            probe.ensurePolished()
+            self.row_size_hint = probe.sizeHint() + QSize(0, 8)
+            probe.deleteLater()
+        for _ in self.row_entries:
             item = QListWidgetItem()
-            row = MacroRow(m, self.edit_entry)
-            self.rows[m["key"]] = row
-            size_hint = row.sizeHint()
-            item.setSizeHint(size_hint + QSize(0, 8))
+            item.setSizeHint(self.row_size_hint)
             self.list_widget.addItem(item)
-            self.list_widget.setItemWidget(item, row)
+
+        self.materialize_rows()
+
+    def materialize_rows(self, *args):
+        """Attach row widgets to the items currently in the viewport"""
+        lw = self.list_widget
+        count = lw.count()
+        if not count:
+            return
+        viewport = lw.viewport()
+        first = lw.indexAt(QPoint(0, 0)).row()
+        last = lw.indexAt(QPoint(0, viewport.height() - 1)).row()
+        first = max(first, 0)
+        last = count - 1 if last < 0 else min(last + 2, count - 1)  # Small lookahead
+        remaining = activations = None
+
+        for i in range(first, last + 1):
+            item = lw.item(i)
+            if lw.itemWidget(item) is not None:
+                continue
+            entry = self.row_entries[i]
+            if i == 0:
+                row = MacroRow(entry, self.edit_center_alignment, is_center=True)
+                self.rows["_center_"] = row
+            else:
+                row = MacroRow(entry, self.edit_entry, toggle_callback=self.push_entry_update)
+                self.rows[entry["key"]] = row
+            key = "_center_" if i == 0 else entry["key"]
+            if key in self.row_tooltips:
+                row.setToolTip(self.row_tooltips[key])
+            if self.runner.running:
+                if remaining is None:
+                    remaining = self.runner.remaining()
+                    activations = self.runner.next_activations()
+                self.sync_row(key, row, remaining, activations)
+            lw.setItemWidget(item, row)
 
     # ---------- CONTROLS ----------
     def start_macro(self):
-        regular_macros = [m for m in self.macros if m.get("enabled", True)]
+        # Disabled macros are passed too, so toggling one on mid-session works
+        regular_macros = list(self.macros)
+        self.running_macros = regular_macros
+        center_enabled = self.center_alignment.get("enabled", True)
+        center_auto = center_enabled and self.center_alignment["center_config"]["mode"] == "Auto"
         
-        # Handle center alignment
-        if self.center_alignment.get("enabled", True):
-            mode = self.center_alignment["center_config"]["mode"]
-            if mode == "Auto":
+        offsets = None
+        center_offset = 0.0
+        self.run_status = "Running"
+        # Planning reads the same delays as the runner, so a bad one is
+        # reported as "Cannot Start" by either
+        try:
+            if self.auto_phase:
+                offsets, center_offset = self.plan_phases(regular_macros, center_auto)
+            
+            # Handle center alignment
+            if center_enabled and center_auto:
                 # Add as regular macro with special handling
-                self.runner.start_with_center(regular_macros, self.center_alignment)
+                self.runner.start_with_center(regular_macros, self.center_alignment, offsets, center_offset)
             else:
-                # Manual mode - start regular macros and set up trigger
-                self.runner.start(regular_macros)
-                self.setup_manual_trigger()
-        else:
-            self.runner.start(regular_macros)
+                self.runner.start(regular_macros, offsets)
+        except ValueError as e:
+            self.warn("Cannot Start", str(e))
+            return
+        if center_enabled and not center_auto:
+            # Manual mode - regular macros run, center fires on its trigger keys
+            self.setup_manual_trigger()
         
-        self.status.setText("Running")
+        self.setup_reactions()
+        self.set_status(self.run_status)
+
+    def plan_phases(self, macros, center_auto):
+        """Pick start offsets for the planner and show them on the rows"""
+        # Chained macros are timed by their parent, not by an offset
+        enabled = [i for i, m in enumerate(macros) if m.get("enabled", True) and not m.get("after")]
+        # A missing delay or key is reported by runner.start()
+        items = [(float(macros[i].get("delay", 0.0)), macros[i].get("repeat", -1), 1) for i in enabled]
+        if center_auto:
+            interval = self.center_alignment["center_config"]["interval"]
+            items.append((interval, -1, 2))  # Presses both , and .
+        
+        planned, peak, naive_peak = plan_offsets(items)
+        center_offset = planned.pop() if center_auto else 0.0
+        
+        offsets = [0.0] * len(macros)
+        self.row_tooltips.clear()
+        for i, offset in zip(enabled, planned):
+            offsets[i] = offset
+            self.row_tooltips[macros[i].get("key")] = f"Start offset: {offset * 1000:.0f} ms"
+        if center_auto:
+            self.row_tooltips["_center_"] = f"Start offset: {center_offset * 1000:.0f} ms"
+        for key, row in self.rows.items():
+            if key in self.row_tooltips:
+                row.setToolTip(self.row_tooltips[key])
+        
+        window_ms = PLAN_WINDOW * 1000
+        self.run_status = f"Running | peak {peak} keys/{window_ms:.0f}ms (unplanned {naive_peak})"
+        return offsets, center_offset
+
+    def push_entry_update(self, entry):
+        """Send an edited macro to the running session as a new spec version"""
+        if not self.runner.running:
+            return
+        for spec_id, m in enumerate(self.running_macros):
+            if m is entry:
+                self.runner.update_macro(
+                    spec_id,
+                    name=entry["name"],
+                    delay=float(entry.get("delay", 0.0)),
+                    repeat=entry.get("repeat", -1),
+                    enabled=entry.get("enabled", True),
+                )
+                return
 
     def pause_macro(self):
         if self.runner.paused:
-            self.runner.resume()
-            self.status.setText("Running")
+            self.resume_macro()
         else:
             self.runner.pause()
-            self.status.setText("Paused")
+            self.set_status("Paused")
+
+    def resume_macro(self):
+        self.runner.resume()
+        self.set_status(self.run_status)
 
     def stop_macro(self):
         self.runner.stop()
         self.stop_manual_trigger()
-        self.status.setText("Stopped")
+        self.stop_reactions()
+        self.set_status(self.stopped_status())
+
+    def warn(self, title, text):
+        """Show a warning box; safe to call from hotkey threads"""
+        log.warning("%s: %s", title, text)
+        self.warning_signal.raised.emit(title, text)
+
+    def show_warning(self, title, text):
+        QMessageBox.warning(self, title, text)
+
+    def set_status(self, text):
+        """Set the status label; safe to call from hotkey threads"""
+        self.status_signal.changed.emit(text)
+
+    def show_status(self, text):
+        self.status_text = text
+        self.status.setText(f"{text} | profiling" if self.profiler.running else text)
+
+    def stopped_status(self):
+        errors = self.runner.stats.error_count()
+        if errors:
+            return f"Stopped | {errors} errors, see {os.path.basename(self.log_file)}"
+        return "Stopped"
     
     def setup_manual_trigger(self):
         trigger_key1 = self.center_alignment["center_config"]["trigger_key1"]
@@ -589,8 +763,9 @@ class MacroApp(QWidget):
         try:
             if self.manual_trigger_listener:
                 self.manual_trigger_listener.stop()
-        except:
-            pass
+        except Exception:
+            self.runner.stats.record_error("listener_stop")
+            log.exception("Failed to stop previous manual trigger listener")
         
         # Format keys properly for GlobalHotKeys
         def format_key(key):
@@ -609,8 +784,35 @@ class MacroApp(QWidget):
             if self.manual_trigger_listener:
                 self.manual_trigger_listener.stop()
                 self.manual_trigger_listener = None
-        except:
-            pass
+        except Exception:
+            self.runner.stats.record_error("listener_stop")
+            log.exception("Failed to stop manual trigger listener")
+
+    def setup_reactions(self):
+        self.stop_reactions()
+        if not self.reactions:
+            return
+        try:
+            table = compile_rules(self.reactions)
+        except ValueError as e:
+            self.warn("Reactions Disabled", str(e))
+            return
+        dispatcher = ReactionDispatcher(self.runner, table)
+        
+        def on_press(k):
+            try:
+                key = k.char
+            except AttributeError:
+                key = str(k).replace("Key.", "")
+            dispatcher.on_press(key)
+        
+        self.reaction_listener = keyboard.Listener(on_press=on_press)
+        self.reaction_listener.start()
+    
+    def stop_reactions(self):
+        if self.reaction_listener:
+            self.reaction_listener.stop()
+            self.reaction_listener = None
 
     # ---------- ADD ----------
     def add_key(self):
@@ -670,7 +872,7 @@ class MacroApp(QWidget):
 
         delay, ok = QInputDialog.getDouble(
             self, "Edit Delay", "Seconds:",
-            entry["delay"], 0, 1800, 2
+            entry.get("delay", 0.0), 0, 1800, 2
         )
         if not ok:
             return
@@ -685,11 +887,13 @@ class MacroApp(QWidget):
         entry["name"] = name
         entry["delay"] = delay
         entry["repeat"] = repeat
+        self.push_entry_update(entry)
         
         self.refresh_list()
         self.save_config()
     
     def edit_center_alignment(self, entry):
+        from center_dialog import CenterAlignmentDialog  # Loaded on first use
         dlg = CenterAlignmentDialog(self.center_alignment["center_config"], self)
         if dlg.exec():
             self.center_alignment["center_config"] = dlg.get_config()
@@ -703,12 +907,80 @@ class MacroApp(QWidget):
             QMessageBox.warning(self, "Cannot Delete", "Center Alignment macro cannot be deleted.")
             return
         if row > 0:
-            self.macros.pop(row - 1)  # -1 because center alignment is at index 0
+            entry = self.macros.pop(row - 1)  # -1 because center alignment is at index 0
+            entry["enabled"] = False
+            self.push_entry_update(entry)  # Stop it if it is running
             self.refresh_list()
             self.save_config()
 
+    # ---------- IMPORT / EXPORT ----------
+    def import_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Macros", "", "Macros (*.json *.csv)")
+        if not path:
+            return
+        try:
+            imported = import_macros(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Import Failed", f"{os.path.basename(path)}: {e}")
+            return
+
+        replace = False
+        if self.macros:
+            box = QMessageBox(self)
+            box.setWindowTitle("Import Macros")
+            box.setText(f"Import {len(imported)} macros. Replace the current {len(self.macros)} or add to them?")
+            replace_btn = box.addButton("Replace", QMessageBox.DestructiveRole)
+            append_btn = box.addButton("Append", QMessageBox.AcceptRole)
+            box.addButton(QMessageBox.Cancel)
+            box.exec()
+            if box.clickedButton() not in (replace_btn, append_btn):
+                return
+            replace = box.clickedButton() is replace_btn
+
+        if replace:
+            # Stop the replaced macros if running; their dicts may belong to a
+            # profile, so they keep their own enabled flags
+            replaced = set(map(id, self.macros))
+            for spec_id, entry in enumerate(self.running_macros):
+                if id(entry) in replaced:
+                    self.runner.update_macro(spec_id, enabled=False)
+            self.macros = imported
+        else:
+            self.macros.extend(imported)
+        log.info("imported %d macros from %s", len(imported), path)
+
+        self.refresh_list()
+        self.save_config()
+
+    def export_file(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Macros", "macros.json", "JSON (*.json);;CSV (*.csv)")
+        if not path:
+            return
+        try:
+            export_macros(path, self.macros)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Failed", str(e))
+
+    def batch_edit(self):
+        if not self.macros:
+            return
+        from batch_editor import BatchEditDialog  # Loaded on first use
+        dlg = BatchEditDialog(self.macros, self)
+        if not dlg.exec():
+            return
+
+        # One pass over the model, then a single refresh and save for the whole batch
+        for entry, edited in zip(self.macros, dlg.get_macros()):
+            if edited != entry:
+                entry.update(edited)
+                self.push_entry_update(entry)
+
+        self.refresh_list()
+        self.save_config()
+
     # ---------- SETTINGS ----------
     def open_settings(self):
+        from settings_dialog import SettingsDialog  # Loaded on first use
         dlg = SettingsDialog(self.start_key, self.stop_key, self.pause_key)
         if dlg.exec():
             self.start_key, self.stop_key, self.pause_key = dlg.get_keys()
@@ -730,33 +1002,232 @@ class MacroApp(QWidget):
         self.hotkeys = GlobalHotKeys({
             f"<{self.start_key}>": self.start_macro,
             f"<{self.pause_key}>": self.pause_macro,
-            f"<{self.stop_key}>": self.stop_macro
+            f"<{self.stop_key}>": self.stop_macro,
+            f"<{self.profile_key}>": self.toggle_profiler
         })
         self.hotkeys.start()
 
+    # ---------- PROFILER ----------
+    def toggle_profiler(self):
+        if not self.profiler.running:
+            self.profiler.start()
+            log.info("Sampling profiler started")
+            self.status_signal.refresh.emit()
+            return
+
+        directory = os.path.dirname(os.path.abspath(CONFIG_FILE))
+        try:
+            path = self.profiler.stop(directory)
+        except OSError as e:
+            log.error("Could not write profile to %s: %s", directory, e)
+            return
+        log.info("Profile with %d samples written to %s", self.profiler.sample_count, path)
+        self.status_signal.refresh.emit()
+
+    # ---------- LOGGING ----------
+    def setup_logging(self):
+        path = os.path.join(os.path.dirname(os.path.abspath(CONFIG_FILE)), self.log_file)
+        try:
+            parse_level(self.log_level)
+        except ValueError as e:
+            QMessageBox.warning(self, "Log Level Ignored", f"Logging at INFO: {e}")
+            self.log_level = "INFO"
+        self.log_pipeline = LogPipeline(path, self.log_level)
+        try:
+            self.log_pipeline.start()
+        except OSError as e:
+            QMessageBox.warning(self, "Logging Disabled", f"Could not open {path}: {e}")
+            self.log_pipeline = None
+
+    def set_log_level(self, level):
+        """Switch verbosity at runtime; raises ValueError for unknown levels"""
+        parse_level(level)
+        if self.log_pipeline:
+            self.log_pipeline.set_level(level)
+        self.log_level = level.upper()
+
+    # ---------- METRICS ----------
+    def setup_metrics(self):
+        if not self.metrics_port:
+            return
+        self.metrics_server = MetricsServer(self.runner, self.metrics_port)
+        try:
+            self.metrics_server.start()
+        except OSError as e:
+            log.error("Could not start metrics server on port %s: %s", self.metrics_port, e)
+            self.metrics_server = None
+
+    # ---------- RUNNER OPTIONS ----------
+    def configure_runner(self):
+        self.runner.realtime = self.realtime
+        self.runner.watchdog.threshold = self.stall_threshold_ms / 1000.0
+        self.runner.freeze_on_pause = self.freeze_on_pause
+        self.runner.resume_stagger = self.resume_stagger_ms / 1000.0
+        self.runner.timing_seed = self.timing_seed
+        self.runner.thread_priority = self.thread_priority
+        self.runner.cpu_affinity = self.cpu_affinity
+
+        if self.realtime and not self.heartbeat_timer:
+            # Heartbeat lets the watchdog blame stalls on a busy GUI thread
+            self.heartbeat_timer = QTimer(self)
+            self.heartbeat_timer.timeout.connect(self.runner.watchdog.gui_heartbeat)
+            self.heartbeat_timer.start(int(self.runner.watchdog.gui_interval * 1000))
+        elif not self.realtime and self.heartbeat_timer:
+            self.heartbeat_timer.stop()
+            self.heartbeat_timer = None
+
+    # ---------- CONTROL ----------
+    def setup_control(self):
+        if not self.control_enabled:
+            return
+        self.control_signal = ControlSignal()
+        self.control_signal.command.connect(self.on_control_command)
+        self.control_server = ControlServer(self.handle_control, self.control_address)
+        try:
+            self.control_server.start()
+        except OSError as e:
+            log.error("Could not open control socket %s: %s", self.control_address, e)
+            self.control_server = None
+            return
+        self.runner.add_fire_listener(self.control_server.publish_fire)
+
+    def handle_control(self, command, arg):
+        """Runs on a control connection thread; GUI work is queued to the Qt thread"""
+        if command == "status":
+            return self.runner.state
+        if command == "loglevel":
+            self.set_log_level(arg)
+            return self.log_level
+        if command == "profile" and arg not in self.profiles:
+            raise ValueError(f"unknown profile {arg!r}")
+        if command == "config":
+            try:
+                data = json.loads(arg)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"invalid config: {e}")
+            if not isinstance(data, dict):
+                raise ValueError("config must be a JSON object")
+        self.control_signal.command.emit(command, arg)
+        return None
+
+    def on_control_command(self, command, arg):
+        if command == "start":
+            self.start_macro()
+        elif command == "stop":
+            self.stop_macro()
+        elif command == "pause":
+            if self.runner.running and not self.runner.paused:
+                self.pause_macro()
+        elif command == "resume":
+            if self.runner.paused:
+                self.resume_macro()
+        elif command == "profile":
+            self.switch_profile(arg)
+        elif command == "config":
+            self.push_config(json.loads(arg))
+
+    def switch_profile(self, name):
+        profile = self.profiles[name]
+        was_running = self.runner.running
+        if was_running:
+            self.stop_macro()
+        self.macros = profile.get("macros", [])
+        self.center_alignment = profile.get("center_alignment", self.center_alignment)
+        self.refresh_list()
+        self.save_config()
+        if was_running:
+            self.start_macro()
+
+    def push_config(self, data):
+        was_running = self.runner.running
+        if was_running:
+            self.stop_macro()
+        self.apply_config(data)
+        self.update_buttons()
+        self.setup_hotkeys()
+        self.save_config()
+        if was_running:
+            self.start_macro()
+
     # ---------- SAVE / LOAD ----------
+    def apply_config(self, data):
+        self.macros = data.get("macros", self.macros)
+        self.start_key = data.get("start_key", self.start_key)
+        self.stop_key = data.get("stop_key", self.stop_key)
+        self.pause_key = data.get("pause_key", self.pause_key)
+        self.profile_key = data.get("profile_key", self.profile_key)
+        self.center_alignment = data.get("center_alignment", self.center_alignment)
+        self.metrics_port = data.get("metrics_port", self.metrics_port)
+        self.profiles = data.get("profiles", self.profiles)
+        self.control_enabled = data.get("control", self.control_enabled)
+        self.control_address = data.get("control_address", self.control_address)
+        self.realtime = data.get("realtime", self.realtime)
+        self.stall_threshold_ms = data.get("stall_threshold_ms", self.stall_threshold_ms)
+        self.thread_priority = data.get("thread_priority", self.thread_priority)
+        self.cpu_affinity = data.get("cpu_affinity", self.cpu_affinity)
+        self.use_tray = data.get("tray", self.use_tray)
+        self.freeze_on_pause = data.get("freeze_on_pause", self.freeze_on_pause)
+        self.resume_stagger_ms = data.get("resume_stagger_ms", self.resume_stagger_ms)
+        self.auto_phase = data.get("auto_phase", self.auto_phase)
+        self.timing_seed = data.get("timing_seed", self.timing_seed)
+        self.reactions = data.get("reactions", self.reactions)
+        self.log_level = data.get("log_level", self.log_level)
+        self.log_file = data.get("log_file", self.log_file)
+        self.startup_budget_ms = data.get("startup_budget_ms", self.startup_budget_ms)
+        self.configure_runner()
+        self.refresh_list()
+
     def load_config(self):
         try:
             with open(CONFIG_FILE) as f:
-                data = json.load(f)
-                self.macros = data.get("macros", [])
-                self.start_key = data.get("start_key", self.start_key)
-                self.stop_key = data.get("stop_key", self.stop_key)
-                self.pause_key = data.get("pause_key", self.pause_key)
-                self.center_alignment = data.get("center_alignment", self.center_alignment)
-                self.refresh_list()
+                self.apply_config(json.load(f))
         except FileNotFoundError:
             pass
 
     def save_config(self):
+        data = {
+            "start_key": self.start_key,
+            "stop_key": self.stop_key,
+            "pause_key": self.pause_key,
+            "profile_key": self.profile_key,
+            "center_alignment": self.center_alignment,
+            "macros": self.macros
+        }
+        if self.metrics_port:
+            data["metrics_port"] = self.metrics_port
+        if self.log_level != "INFO":
+            data["log_level"] = self.log_level
+        if self.log_file != "macro.log":
+            data["log_file"] = self.log_file
+        if self.startup_budget_ms != 1000:
+            data["startup_budget_ms"] = self.startup_budget_ms
+        if self.reactions:
+            data["reactions"] = self.reactions
+        if self.profiles:
+            data["profiles"] = self.profiles
+        if not self.freeze_on_pause:
+            data["freeze_on_pause"] = False
+        if not self.auto_phase:
+            data["auto_phase"] = False
+        if self.timing_seed is not None:
+            data["timing_seed"] = self.timing_seed
+        if self.resume_stagger_ms:
+            data["resume_stagger_ms"] = self.resume_stagger_ms
+        if self.thread_priority != "normal":
+            data["thread_priority"] = self.thread_priority
+        if self.cpu_affinity is not None:
+            data["cpu_affinity"] = self.cpu_affinity
+        if self.use_tray:
+            data["tray"] = True
+        if self.realtime:
+            data["realtime"] = True
+            data["stall_threshold_ms"] = self.stall_threshold_ms
+        if self.control_enabled:
+            data["control"] = True
+            if self.control_address != DEFAULT_ADDRESS:
+                data["control_address"] = self.control_address
         with open(CONFIG_FILE, "w") as f:
-            json.dump({
-                "start_key": self.start_key,
-                "stop_key": self.stop_key,
-                "pause_key": self.pause_key,
-                "center_alignment": self.center_alignment,
-                "macros": self.macros
-            }, f, indent=2)
+            json.dump(data, f, indent=2)
 
     def closeEvent(self, event):
         self.runner.stop()
@@ -765,6 +1236,16 @@ class MacroApp(QWidget):
             self.hotkeys.stop()
         except Exception:
             pass
+        if self.metrics_server:
+            self.metrics_server.stop()
+        if self.control_server:
+            self.control_server.stop()
+        if self.tray:
+            self.tray.hide()
+        if self.profiler.running:
+            self.toggle_profiler()
+        if self.log_pipeline:
+            self.log_pipeline.stop()
         event.accept()
 
 
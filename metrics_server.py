@@ -0,0 +1,111 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def format_prometheus(runner, snapshot):
+    """Render a stats snapshot in the Prometheus text exposition format"""
+    lines = [
+        "# TYPE macro_fires_total counter",
+        "# TYPE macro_missed_cycles_total counter",
+        "# TYPE macro_lateness_seconds gauge",
+        "# TYPE macro_lateness_max_seconds gauge",
+    ]
+    for key, m in sorted(snapshot["macros"].items()):
+        label = key.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'macro_fires_total{{key="{label}"}} {m["fires"]}')
+        lines.append(f'macro_missed_cycles_total{{key="{label}"}} {m["missed_cycles"]}')
+        for q, name in (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99")):
+            lines.append(
+                f'macro_lateness_seconds{{key="{label}",quantile="{q}"}} {m["lateness_" + name]:.6f}'
+            )
+        lines.append(f'macro_lateness_max_seconds{{key="{label}"}} {m["lateness_max"]:.6f}')
+
+    lines += [
+        "# TYPE macro_runner_state gauge",
+    ]
+    for state in ("running", "paused", "stopped"):
+        value = 1 if runner.state == state else 0
+        lines.append(f'macro_runner_state{{state="{state}"}} {value}')
+
+    lines.append("# TYPE macro_stalls_total counter")
+    for cause, count in sorted(snapshot["stalls"].items()):
+        lines.append(f'macro_stalls_total{{cause="{cause}"}} {count}')
+
+    lines.append("# TYPE macro_errors_total counter")
+    for kind, count in sorted(snapshot["errors"].items()):
+        lines.append(f'macro_errors_total{{kind="{kind}"}} {count}')
+
+    lines += [
+        "# TYPE macro_stall_max_seconds gauge",
+        f"macro_stall_max_seconds {snapshot['stall_max']:.6f}",
+        "# TYPE macro_runner_uptime_seconds gauge",
+        f"macro_runner_uptime_seconds {snapshot['uptime']:.3f}",
+        "# TYPE macro_gui_queue_depth gauge",
+        f"macro_gui_queue_depth {snapshot['gui_queue_depth']}",
+        "# TYPE process_threads gauge",
+        f"process_threads {snapshot['threads']}",
+        "# TYPE process_cpu_seconds_total counter",
+        f"process_cpu_seconds_total {snapshot['process_cpu']:.3f}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        runner = self.server.runner
+        snapshot = runner.stats.snapshot()
+
+        if self.path in ("/", "/metrics"):
+            body = format_prometheus(runner, snapshot).encode()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/stats":
+            snapshot["state"] = runner.state
+            snapshot["recent_stalls"] = [
+                {"time": t, "duration": d, "cause": c} for t, d, c in list(runner.watchdog.stalls)
+            ]
+            body = json.dumps(snapshot, indent=2).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the console
+
+
+class MetricsServer:
+    """Serves runner statistics on localhost from its own daemon threads.
+
+    GET /metrics returns Prometheus text, GET /stats returns JSON.
+    """
+
+    def __init__(self, runner, port, host="127.0.0.1"):
+        self.runner = runner
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        if self.httpd:
+            return
+        self.httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.runner = self.runner
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.httpd:
+            return
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.httpd = None
+        self.thread = None
@@ -0,0 +1,72 @@
+import math
+
+
+PLAN_WINDOW = 0.01  # Keys due within this many seconds count as colliding
+PLAN_HORIZON = 30.0  # Seconds of schedule simulated when scoring offsets
+MAX_CANDIDATES = 64  # Offsets tried per macro
+
+
+def fire_bins(period, offset, repeat, window, horizon):
+    """Window indices of every fire of a macro within the horizon"""
+    bins = []
+    t = offset + period
+    count = 0
+    while t < horizon and (repeat < 0 or count < repeat):
+        bins.append(int(t / window))
+        t += period
+        count += 1
+    return bins
+
+
+def peak_load(load):
+    return max(load) if load else 0
+
+
+def plan_offsets(items, window=PLAN_WINDOW, horizon=PLAN_HORIZON, max_candidates=MAX_CANDIDATES):
+    """Pick start offsets that spread fires out.
+
+    `items` is a list of (period, repeat, weight) tuples, where weight is
+    the number of keys pressed per fire. Returns (offsets, peak, naive_peak):
+    an offset in seconds per item, the largest number of keys due within
+    any `window` with those offsets, and the same figure with every macro
+    starting at once.
+
+    Greedy: macros are placed most-frequent first, each at the candidate
+    offset that keeps the running peak (then the total overlap) lowest.
+    """
+    size = int(math.ceil(horizon / window)) + 1
+    naive = [0] * size
+    for period, repeat, weight in items:
+        if period > 0:
+            for b in fire_bins(period, 0.0, repeat, window, horizon):
+                naive[b] += weight
+
+    load = [0] * size
+    offsets = [0.0] * len(items)
+    order = sorted(range(len(items)), key=lambda i: items[i][0])
+
+    for i in order:
+        period, repeat, weight = items[i]
+        if period <= 0:
+            continue
+
+        slots = max(1, int(period / window))
+        step = max(1, slots // max_candidates)
+        best = None
+        for slot in range(0, slots, step):
+            offset = slot * window
+            bins = fire_bins(period, offset, repeat, window, horizon)
+            worst = 0
+            overlap = 0
+            for b in bins:
+                worst = max(worst, load[b])
+                overlap += load[b]
+            score = (worst, overlap, offset)
+            if best is None or score < best[0]:
+                best = (score, offset, bins)
+
+        _, offsets[i], bins = best
+        for b in bins:
+            load[b] += weight
+
+    return offsets, peak_load(load), peak_load(naive)
@@ -0,0 +1,114 @@
+import time
+from collections import deque
+
+
+REACTION_BUDGET = 0.001  # Seconds of trigger-to-action lateness we tolerate
+
+
+class ReactionRule:
+    """Press `action` `delay` seconds after `trigger` is pressed `count`
+    times within `within` seconds"""
+    __slots__ = ("name", "trigger", "count", "within", "action", "delay", "presses")
+
+    def __init__(self, name, trigger, action, delay=0.0, count=1, within=0.0):
+        self.name = name
+        self.trigger = trigger
+        self.action = action
+        self.delay = delay
+        self.count = count
+        self.within = within
+        self.presses = deque(maxlen=count)  # Recent trigger times, for count > 1
+
+
+def compile_rules(reactions):
+    """Build the dispatch table {trigger key: (rule, ...)} from config entries.
+
+    Raises ValueError for malformed rules and for rules whose actions would
+    trigger each other forever.
+    """
+    table = {}
+    edges = {}
+    for i, r in enumerate(reactions):
+        if not r.get("enabled", True):
+            continue
+        name = r.get("name") or f"reaction {i + 1}"
+        try:
+            rule = ReactionRule(
+                name,
+                r["trigger"],
+                r["action"],
+                delay=r.get("delay_ms", 0) / 1000.0,
+                count=int(r.get("count", 1)),
+                within=r.get("within_ms", 0) / 1000.0,
+            )
+        except KeyError as e:
+            raise ValueError(f"{name}: missing {e.args[0]!r}")
+        if rule.count < 1 or rule.delay < 0:
+            raise ValueError(f"{name}: count must be at least 1 and delay not negative")
+        if rule.count > 1 and rule.within <= 0:
+            raise ValueError(f"{name}: within_ms is required when count > 1")
+
+        table.setdefault(rule.trigger, []).append(rule)
+        edges.setdefault(rule.trigger, set()).add(rule.action)
+
+    cycle = find_cycle(edges)
+    if cycle:
+        raise ValueError("reactions trigger each other in a loop: " + " -> ".join(cycle))
+
+    return {key: tuple(rules) for key, rules in table.items()}
+
+
+def find_cycle(edges):
+    """Return a list of nodes forming a cycle in `edges`, or None"""
+    visiting, done = set(), set()
+
+    def visit(node, path):
+        visiting.add(node)
+        path.append(node)
+        for nxt in edges.get(node, ()):
+            if nxt in visiting:
+                return path[path.index(nxt):] + [nxt]
+            if nxt not in done:
+                found = visit(nxt, path)
+                if found:
+                    return found
+        visiting.discard(node)
+        done.add(node)
+        path.pop()
+        return None
+
+    for node in list(edges):
+        if node not in done:
+            found = visit(node, [])
+            if found:
+                return found
+    return None
+
+
+class ReactionDispatcher:
+    """Consulted from the keyboard hook thread on every key press.
+
+    A press costs one dict lookup when no rule uses the key; matching rules
+    hand their action to the runner's timer thread, timed from the moment
+    the press was observed.
+    """
+
+    def __init__(self, runner, table):
+        self.runner = runner
+        self.table = table
+
+    def on_press(self, key):
+        rules = self.table.get(key)
+        if not rules or not self.runner.running or self.runner.paused:
+            return
+        now = time.monotonic()
+        for rule in rules:
+            if rule.count > 1:
+                presses = rule.presses
+                presses.append(now)
+                if len(presses) < rule.count or now - presses[0] > rule.within:
+                    continue
+                presses.clear()
+            self.runner.schedule(
+                rule.delay, rule.action, label=f"react:{rule.name}", origin=now, budget=REACTION_BUDGET
+            )
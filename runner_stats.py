@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import deque
+
+
+LATENESS_SAMPLES = 1024  # Recent lateness samples kept per macro
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class RunnerStats:
+    """Counters updated by the runner threads and read by the metrics server.
+
+    Writers only hold the lock long enough to bump a counter or append a
+    sample; readers copy everything out in snapshot() and do the heavy
+    work (sorting, formatting) without the lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Signals still queued for the GUI outlive a session, so these two
+        # are kept across reset()
+        self.gui_emitted = 0
+        self.gui_delivered = 0
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started_at = time.monotonic()
+            self.fires = {}
+            self.lateness = {}
+            self.missed = {}
+            self.stalls = {}
+            self.stall_max = 0.0
+            self.errors = {}
+
+    def record_fire(self, key, lateness, delay, budget=None):
+        """Record one fire of `key`, `lateness` seconds after its deadline.
+
+        Periodic macros count a missed cycle per whole `delay` of lateness;
+        one-shot actions count a miss when lateness exceeds `budget`.
+        """
+        if budget is not None:
+            missed = 1 if lateness > budget else 0
+        else:
+            missed = int(lateness // delay) if delay > 0 and lateness > 0 else 0
+        with self.lock:
+            self.fires[key] = self.fires.get(key, 0) + 1
+            samples = self.lateness.get(key)
+            if samples is None:
+                samples = self.lateness[key] = deque(maxlen=LATENESS_SAMPLES)
+            samples.append(lateness)
+            if missed:
+                self.missed[key] = self.missed.get(key, 0) + missed
+
+    def record_stall(self, cause, duration):
+        with self.lock:
+            self.stalls[cause] = self.stalls.get(cause, 0) + 1
+            self.stall_max = max(self.stall_max, duration)
+
+    def record_error(self, kind):
+        """Count an error that was handled rather than raised"""
+        with self.lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def error_count(self):
+        return sum(self.errors.values())
+
+    def note_emit(self):
+        """A signal for the GUI thread was emitted"""
+        with self.lock:
+            self.gui_emitted += 1
+
+    def note_delivered(self):
+        """The GUI thread handled a signal emitted by the runner"""
+        with self.lock:
+            self.gui_delivered += 1
+
+    def snapshot(self):
+        with self.lock:
+            fires = dict(self.fires)
+            lateness = {k: list(v) for k, v in self.lateness.items()}
+            missed = dict(self.missed)
+            stalls = dict(self.stalls)
+            stall_max = self.stall_max
+            errors = dict(self.errors)
+            queue_depth = self.gui_emitted - self.gui_delivered
+            uptime = time.monotonic() - self.started_at
+
+        macros = {}
+        for key, count in fires.items():
+            samples = sorted(lateness.get(key, ()))
+            macros[key] = {
+                "fires": count,
+                "missed_cycles": missed.get(key, 0),
+                "lateness_p50": percentile(samples, 50),
+                "lateness_p90": percentile(samples, 90),
+                "lateness_p99": percentile(samples, 99),
+                "lateness_max": samples[-1] if samples else 0.0,
+            }
+
+        return {
+            "uptime": uptime,
+            "macros": macros,
+            "gui_queue_depth": queue_depth,
+            "stalls": stalls,
+            "stall_max": stall_max,
+            "errors": errors,
+            "threads": threading.active_count(),
+            "process_cpu": time.process_time(),
+        }
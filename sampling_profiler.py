@@ -0,0 +1,75 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """In-process sampling profiler covering every Python thread.
+
+    While running, a daemon thread grabs all thread stacks every `interval`
+    seconds. Nothing is installed when stopped, so it costs nothing until
+    toggled on. Output is the collapsed-stack format read by flamegraph.pl
+    and speedscope: one "thread;outer;...;inner count" line per stack.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.started_at = None
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        if self.thread:
+            return
+        self.samples = Counter()
+        self.sample_count = 0
+        self.stop_event.clear()
+        self.started_at = time.time()
+        self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self, directory):
+        """Stop sampling and write the collapsed stacks; returns the file path"""
+        if not self.thread:
+            return None
+        self.stop_event.set()
+        self.thread.join(timeout=1)
+        self.thread = None
+
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        path = os.path.join(directory, f"profile-{stamp}.collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def _run(self):
+        me = threading.get_ident()
+        labels = {}  # Code object -> frame label, computed once per function
+        while not self.stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = (
+                            f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                        )
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                stack.reverse()
+                self.samples[";".join(stack)] += 1
+            self.sample_count += 1
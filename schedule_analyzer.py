@@ -0,0 +1,260 @@
+"""Offline load profile of a config.json, without running it.
+
+Usage:
+    python schedule_analyzer.py [config.json] [--horizon HOURS] [--window MS] [--no-phase]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from activity_schedule import EPSILON, parse_schedule
+from app_config import CONFIG_FILE, read_config
+from macro_spec import parse_after, parse_jitter
+from phase_planner import plan_offsets
+from timing_streams import jittered_delays, spawn_generators
+
+
+CENTER_GAP = 0.001  # Seconds between the two center alignment presses
+
+
+def schedule_items(data, phase=True):
+    """Enabled timed entries as (label, keys, period, repeat, offset, jitter,
+    schedule) tuples, `jitter` being None or (jitter spec, generator) and
+    `schedule` None or an ActivitySchedule"""
+    # Generators are spawned per macro position, as the runner does, so a
+    # config with timing_seed set simulates the delays it would really use
+    rngs = spawn_generators(data.get("timing_seed"), len(data["macros"]))
+    items = [
+        (
+            m["name"], [m["key"]], float(m["delay"]), m.get("repeat", -1), _jitter(m, rng),
+            parse_schedule(m.get("schedule"), m["name"]),
+        )
+        for m, rng in zip(data["macros"], rngs)
+        if m.get("enabled", True) and not m.get("after")
+    ]
+
+    center = data["center_alignment"]
+    center_config = center["center_config"]
+    if center.get("enabled", True) and center_config.get("mode", "Auto") == "Auto":
+        items.append((center["name"], [",", "."], float(center_config["interval"]), -1, None, None))
+
+    offsets = [0.0] * len(items)
+    if phase:
+        offsets, _, _ = plan_offsets([(period, repeat, len(keys)) for _, keys, period, repeat, _, _ in items])
+
+    return [item[:4] + (offset,) + item[4:] for item, offset in zip(items, offsets)]
+
+
+def chained_items(data):
+    """Enabled macros fired by another macro, as (label, keys, parent label,
+    offset, repeat) tuples"""
+    items = []
+    for m in data["macros"]:
+        after = parse_after(m.get("after"), m.get("name", ""))
+        if after and m.get("enabled", True):
+            items.append((m["name"], [m["key"]], after[0], after[1], m.get("repeat", -1)))
+    return items
+
+
+def _jitter(macro, rng):
+    jitter = parse_jitter(macro.get("jitter"), macro.get("name", ""))
+    return (jitter, rng) if jitter else None
+
+
+def fire_times(period, repeat, offset, jitter, horizon):
+    """Times of every fire before `horizon`"""
+    if jitter is None:
+        count = int((horizon - offset) // period)
+        if repeat >= 0:
+            count = min(count, repeat)
+        return offset + period * np.arange(1, count + 1, dtype=np.float64)
+
+    # Draw in chunks until the horizon is passed; the generator yields the
+    # same sequence whatever the chunk sizes, so this matches the runner
+    spec, rng = jitter
+    chunk_size = max(int((horizon - offset) / max(period, spec[2])) + 1, 256)
+    chunks = []
+    drawn = 0
+    last = offset
+    while last < horizon and (repeat < 0 or drawn < repeat):
+        chunk = last + np.cumsum(jittered_delays(spec, rng, period, chunk_size))
+        chunks.append(chunk)
+        drawn += chunk.size
+        last = chunk[-1]
+    if not chunks:
+        return np.empty(0)
+    times = np.concatenate(chunks)
+    times = times[times <= horizon]
+    return times if repeat < 0 else times[:repeat]
+
+
+def active_stretches(schedule, horizon, start_wall):
+    """(starts, ends) arrays of the session seconds within `horizon` that
+    `schedule` lets a macro fire, for a session started at `start_wall`"""
+    starts, ends = [], []
+    t = 0.0
+    while t < horizon:
+        wait = schedule.wait_time(t, start_wall + t)
+        if wait is None:
+            break
+        t += wait
+        session_left, wall_left = schedule.active_for(t, start_wall + t)
+        starts.append(t)
+        ends.append(t + min(session_left, wall_left))
+        t = ends[-1] + EPSILON
+    return np.array(starts, dtype=np.float64), np.array(ends, dtype=np.float64)
+
+
+def in_stretches(times, stretches):
+    """Mask of the `times` falling inside the (starts, ends) stretches"""
+    starts, ends = stretches
+    if not starts.size:
+        return np.zeros(times.shape, dtype=bool)
+    i = np.searchsorted(starts, times, side="right") - 1
+    return (i >= 0) & (times < ends[np.maximum(i, 0)])
+
+
+def expand_timeline(items, horizon, chained=(), start_wall=None):
+    """Every fire within `horizon` seconds as sorted (times, key index, key names).
+
+    Scheduled macros lose the fires that fall outside their active
+    stretches, with windows placed as if the session started at
+    `start_wall` (default now). The runner restarts a macro's countdown
+    when a stretch begins; that shift is not modelled."""
+    if start_wall is None:
+        start_wall = time.time()
+    key_names = []
+    key_index = {}
+    all_times = []
+    all_keys = []
+
+    fired = []
+    by_label = {}
+    for label, keys, period, repeat, offset, jitter, schedule in items:
+        if period <= 0 and (jitter is None or jitter[0][2] <= 0):
+            print(f"warning: {label!r} has no delay and fires continuously; skipped", file=sys.stderr)
+            continue
+        if schedule is None:
+            times = fire_times(period, repeat, offset, jitter, horizon)
+        else:
+            times = fire_times(period, -1, offset, jitter, horizon)
+            times = times[in_stretches(times, active_stretches(schedule, horizon, start_wall))]
+            if repeat >= 0:
+                times = times[:repeat]
+        fired.append((keys, times))
+        by_label[label] = times
+
+    # Chained macros fire a fixed offset after each of their parent's fires;
+    # resolve them parent first, dropping any whose parent never fires
+    pending = list(chained)
+    while pending:
+        waiting = []
+        for label, keys, parent, offset, repeat in pending:
+            if parent not in by_label:
+                waiting.append((label, keys, parent, offset, repeat))
+                continue
+            times = by_label[parent] + offset
+            times = times[times <= horizon]
+            if repeat >= 0:
+                times = times[:repeat]
+            fired.append((keys, times))
+            by_label[label] = times
+        if len(waiting) == len(pending):
+            break
+        pending = waiting
+
+    for keys, times in fired:
+        for n, key in enumerate(keys):
+            if key not in key_index:
+                key_index[key] = len(key_names)
+                key_names.append(key)
+            all_times.append(times + n * CENTER_GAP)
+            all_keys.append(np.full(times.shape, key_index[key], dtype=np.int32))
+
+    if not all_times:
+        return np.empty(0), np.empty(0, dtype=np.int32), key_names
+
+    times = np.concatenate(all_times)
+    keys = np.concatenate(all_keys)
+    order = np.argsort(times, kind="stable")
+    return times[order], keys[order], key_names
+
+
+def analyze(items, horizon, window, chained=(), start_wall=None):
+    times, keys, key_names = expand_timeline(items, horizon, chained, start_wall)
+    report = {"events": int(times.size), "horizon": horizon, "window": window}
+    if not times.size:
+        return report
+
+    per_second = np.bincount(times.astype(np.int64))
+    report["keys_per_sec_peak"] = int(per_second.max())
+    report["keys_per_sec_peak_at"] = float(per_second.argmax())
+    report["keys_per_sec_mean"] = float(times.size / horizon)
+
+    per_window = np.bincount((times / window).astype(np.int64))
+    colliding = np.flatnonzero(per_window > 1)
+    report["collision_windows"] = int(colliding.size)
+    report["collision_peak"] = int(per_window.max())
+    worst = colliding[np.argsort(per_window[colliding], kind="stable")[::-1][:5]]
+    report["worst_windows"] = [(float(w * window), int(per_window[w])) for w in worst]
+
+    totals = np.bincount(keys, minlength=len(key_names))
+    report["per_key"] = {key_names[i]: int(totals[i]) for i in range(len(key_names))}
+
+    report["finish_times"] = {
+        label: offset + period * repeat  # Mean finish for jittered macros
+        for label, _, period, repeat, offset, _, schedule in items
+        if repeat >= 0 and period > 0 and schedule is None
+    }
+    report["scheduled"] = [label for label, *_, schedule in items if schedule is not None]
+    return report
+
+
+def print_report(report):
+    window_ms = report["window"] * 1000
+    print(f"Events: {report['events']:,} over {report['horizon'] / 3600:.2f} h")
+    if not report["events"]:
+        return
+    print(
+        f"Keys/sec: peak {report['keys_per_sec_peak']} at {report['keys_per_sec_peak_at']:.0f}s, "
+        f"mean {report['keys_per_sec_mean']:.2f}"
+    )
+    print(
+        f"Collisions: {report['collision_windows']:,} windows of {window_ms:.0f}ms with more than one key, "
+        f"worst {report['collision_peak']} keys"
+    )
+    for start, count in report["worst_windows"]:
+        print(f"  {start:10.3f}s  {count} keys")
+    print("Per key:")
+    for key, total in sorted(report["per_key"].items(), key=lambda kv: -kv[1]):
+        print(f"  {key:>8}  {total:,}")
+    if report["scheduled"]:
+        print(f"Scheduled, counted only while active from now: {', '.join(report['scheduled'])}")
+    if report["finish_times"]:
+        print("Finite macros finish at:")
+        for label, finish in sorted(report["finish_times"].items(), key=lambda kv: kv[1]):
+            print(f"  {label}: {finish:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config", nargs="?", default=CONFIG_FILE)
+    parser.add_argument("--horizon", type=float, default=1.0, help="hours to simulate")
+    parser.add_argument("--window", type=float, default=10.0, help="collision window in ms")
+    parser.add_argument("--no-phase", action="store_true", help="ignore start offset planning")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    data = read_config(args.config)
+    phase = data.get("auto_phase", True) and not args.no_phase
+    report = analyze(
+        schedule_items(data, phase), args.horizon * 3600, args.window / 1000.0, chained_items(data)
+    )
+    print_report(report)
+    print(f"Analyzed in {time.perf_counter() - started:.3f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,425 @@
+"""Long-session soak test: memory, thread and handle growth over hours of use.
+
+Usage:
+    python soak_test.py [--minutes M] [--speed N] [--macros N] [--seed N]
+                        [--max-rss-mb MB] [--max-threads N] [--max-handles N]
+                        [--max-traced-mb MB] [--max-queue N]
+
+Runs the real MacroApp (offscreen) in a scratch directory with a fake
+keyboard and a fake input backend, and plays a simulated user against it:
+starts and stops, pauses, manual center alignment triggers, reaction
+triggers and macro edits. Key presses go through the GlobalHotKeys and
+keyboard.Listener objects the app creates, each a thread as in pynput, so
+listeners that are never stopped show up as thread growth. Delays and the
+gaps between actions are divided by --speed, so ten minutes at the default
+speed of 100 covers about 17 hours of use.
+
+Every sample records RSS, thread count, open handles, tracemalloc's traced
+memory and the GUI signal queue depth. Growth compares the lowest value in
+the last quarter of the samples taken after warm-up with the lowest in the
+first quarter, using the samples taken between sessions when there are
+enough of them. Threads that come and go with a session do not count, but
+a rising floor does. Exits with status 1 when any growth (or the queue depth
+at any point) exceeds its threshold.
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from app_config import CONFIG_FILE, default_center_alignment
+
+HUMAN_ACTION_GAP = 20.0  # Seconds between simulated user actions before compression
+MACRO_DELAYS = (0.5, 5.0)  # Range of macro delays before compression, seconds
+WARMUP_FRACTION = 0.1  # Share of the run before the baseline sample
+TOP_ALLOCATIONS = 10
+REACTION_TRIGGER = "f9"
+
+
+# ---------- Process counters ----------
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.WinDLL("kernel32")
+    _psapi = ctypes.WinDLL("psapi")
+    _kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+
+    class _MemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    def process_rss():
+        counters = _MemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = _kernel32.GetCurrentProcess()
+        if not _psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize
+
+    def open_handles():
+        count = wintypes.DWORD()
+        if not _kernel32.GetProcessHandleCount(_kernel32.GetCurrentProcess(), ctypes.byref(count)):
+            return None
+        return count.value
+
+else:
+    def process_rss():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def open_handles():
+        try:
+            return len(os.listdir("/proc/self/fd"))
+        except OSError:
+            return None
+
+
+class Sample:
+    __slots__ = ("elapsed", "running", "rss", "threads", "handles", "traced", "queue")
+
+    def __init__(self, elapsed, runner):
+        stats = runner.stats
+        self.elapsed = elapsed
+        self.running = runner.running
+        self.rss = process_rss()
+        self.threads = threading.active_count()
+        self.handles = open_handles()
+        self.traced = tracemalloc.get_traced_memory()[0]
+        self.queue = stats.snapshot()["gui_queue_depth"]
+
+    def line(self, speed):
+        mb = 1024 * 1024
+        rss = f"{self.rss / mb:7.1f} MB" if self.rss is not None else "      n/a"
+        handles = f"{self.handles:5d}" if self.handles is not None else "  n/a"
+        return (
+            f"{self.elapsed / 60:6.1f} min ({self.elapsed * speed / 3600:5.1f} h)  "
+            f"rss {rss}  threads {self.threads:3d}  handles {handles}  "
+            f"traced {self.traced / mb:6.1f} MB  queue {self.queue}"
+        )
+
+
+# ---------- Fake input ----------
+class FakeKey:
+    """What pynput hands listeners: a KeyCode with `char` for characters,
+    a Key whose str() is "Key.<name>" otherwise"""
+
+    def __init__(self, name):
+        if len(name) == 1:
+            self.char = name
+        self.name = name
+
+    def __str__(self):
+        return f"Key.{self.name}"
+
+
+class FakeListener(threading.Thread):
+    """Stands in for pynput's keyboard.Listener: a thread that passes the
+    keys tap() delivers to `on_press`, as pynput's hook thread does"""
+    live = set()  # Started and not yet stopped
+    lock = threading.Lock()
+
+    def __init__(self, on_press=None, on_release=None):
+        super().__init__(name="fake-listener", daemon=True)
+        self.on_press = on_press
+        self.keys = queue.Queue()
+
+    def start(self):
+        with FakeListener.lock:
+            FakeListener.live.add(self)
+        super().start()
+
+    def stop(self):
+        with FakeListener.lock:
+            FakeListener.live.discard(self)
+        self.keys.put(None)
+
+    def run(self):
+        while True:
+            key = self.keys.get()
+            if key is None:
+                return
+            if self.on_press:
+                self.on_press(key)
+
+
+class FakeHotKeys(FakeListener):
+    """Stands in for pynput's GlobalHotKeys, for single-key hotkeys"""
+
+    def __init__(self, hotkeys):
+        super().__init__(on_press=self.dispatch)
+        self.hotkeys = hotkeys
+
+    def dispatch(self, key):
+        callback = self.hotkeys.get(getattr(key, "char", None) or f"<{key.name}>")
+        if callback:
+            callback()
+
+
+class FakeInput:
+    """The fake backend: install() points MacroApp's pynput names at the
+    fakes, tap() presses a key on every live listener"""
+    Listener = FakeListener
+
+    def install(self, module):
+        module.GlobalHotKeys = FakeHotKeys
+        module.keyboard = self
+
+    def tap(self, name):
+        with FakeListener.lock:
+            listeners = list(FakeListener.live)
+        for listener in listeners:
+            listener.keys.put(FakeKey(name))
+
+
+# ---------- Simulated user ----------
+def soak_config(args, rng):
+    """A config.json for the scratch directory, with compressed delays"""
+    keys = "abcdefghijklmnopqrstuvwxyz"
+    macros = [
+        {
+            "name": f"soak {i}",
+            "key": keys[i % len(keys)],
+            "delay": round(rng.uniform(*MACRO_DELAYS) / args.speed, 4),
+            "repeat": -1,
+            "enabled": True,
+        }
+        for i in range(args.macros)
+    ]
+    center = default_center_alignment()
+    center["center_config"]["mode"] = "Manual"
+    center["center_config"]["interval"] = round(10.0 / args.speed, 4)
+    reactions = [{"name": "soak reaction", "trigger": REACTION_TRIGGER, "action": "f10", "delay_ms": 5}]
+    return {"macros": macros, "center_alignment": center, "reactions": reactions}
+
+
+class SimulatedUser:
+    """Random actions against a MacroApp, in the proportions a person
+    would make them. Key actions are taps on the fake input backend, the
+    rest call what the matching dialog calls."""
+
+    def __init__(self, app, keys, rng, speed):
+        self.app = app
+        self.keys = keys
+        self.rng = rng
+        self.speed = speed
+        self.counts = {}
+        self.actions = [
+            (self.toggle_running, 2),
+            (self.toggle_pause, 2),
+            (self.manual_trigger, 6),
+            (self.reaction_trigger, 3),
+            (self.edit_macro, 3),
+            (self.toggle_macro, 2),
+            (self.switch_center_mode, 1),
+        ]
+
+    def act(self):
+        action = self.rng.choices(
+            [a for a, _ in self.actions], weights=[w for _, w in self.actions]
+        )[0]
+        action()
+        self.counts[action.__name__] = self.counts.get(action.__name__, 0) + 1
+
+    def toggle_running(self):
+        self.keys.tap(self.app.stop_key if self.app.runner.running else self.app.start_key)
+
+    def toggle_pause(self):
+        self.keys.tap(self.app.pause_key)
+
+    def manual_trigger(self):
+        center_config = self.app.center_alignment["center_config"]
+        self.keys.tap(center_config[self.rng.choice(("trigger_key1", "trigger_key2"))])
+
+    def reaction_trigger(self):
+        self.keys.tap(REACTION_TRIGGER)
+
+    def edit_macro(self):
+        # What edit_entry does once its dialogs are answered
+        entry = self.rng.choice(self.app.macros)
+        entry["delay"] = round(self.rng.uniform(*MACRO_DELAYS) / self.speed, 4)
+        entry["repeat"] = self.rng.choice((-1, -1, -1, 50))
+        self.app.push_entry_update(entry)
+        self.app.refresh_list()
+        self.app.save_config()
+
+    def toggle_macro(self):
+        entry = self.rng.choice(self.app.macros)
+        entry["enabled"] = not entry.get("enabled", True)
+        self.app.push_entry_update(entry)
+        self.app.refresh_list()
+
+    def switch_center_mode(self):
+        # Takes effect from the next start, as with the center dialog
+        center_config = self.app.center_alignment["center_config"]
+        center_config["mode"] = "Auto" if center_config["mode"] == "Manual" else "Manual"
+        self.app.refresh_list()
+        self.app.save_config()
+
+
+# ---------- Report ----------
+def floor_growth(samples, field):
+    """Lowest value in the last quarter of `samples` minus the lowest in the
+    first, counting only samples taken between sessions when there are
+    enough: a session's threads and buffers vary with what it runs, but
+    whatever is left once it stops should not grow"""
+    if getattr(samples[0], field) is None:
+        return None
+    stopped = [s for s in samples if not s.running]
+    values = [getattr(s, field) for s in (stopped if len(stopped) >= 2 else samples)]
+    quarter = max(1, len(values) // 4)
+    return min(values[-quarter:]) - min(values[:quarter])
+
+
+def evaluate(args, samples):
+    """Print growth against the thresholds; returns the failed checks"""
+    mb = 1024 * 1024
+    checks = [
+        ("RSS growth", floor_growth(samples, "rss"), args.max_rss_mb * mb, mb, "MB"),
+        ("threads growth", floor_growth(samples, "threads"), args.max_threads, 1, ""),
+        ("handles growth", floor_growth(samples, "handles"), args.max_handles, 1, ""),
+        ("traced memory growth", floor_growth(samples, "traced"), args.max_traced_mb * mb, mb, "MB"),
+        ("GUI queue depth peak", max(s.queue for s in samples), args.max_queue, 1, ""),
+    ]
+    failed = []
+    for name, value, limit, unit, suffix in checks:
+        if value is None:
+            print(f"  {name}: not available on this platform")
+            continue
+        ok = value <= limit
+        print(f"  {name}: {value / unit:.1f}{suffix} (limit {limit / unit:.1f}{suffix})"
+              f"{'' if ok else '  FAIL'}")
+        if not ok:
+            failed.append(name)
+    return failed
+
+
+def print_top_allocations(before, after):
+    print(f"Top {TOP_ALLOCATIONS} allocation sites by growth since warm-up:")
+    grown = [s for s in after.compare_to(before, "lineno")[:TOP_ALLOCATIONS] if s.size_diff > 0]
+    if not grown:
+        print("  none")
+    for stat in grown:
+        frame = stat.traceback[0]
+        print(f"  {stat.size_diff / 1024:+9.1f} KiB {stat.count_diff:+7d} blocks  "
+              f"{frame.filename}:{frame.lineno}")
+
+
+# ---------- Run ----------
+def run(args):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+
+    qt_app = QApplication.instance() or QApplication([])
+    import main
+    from benchmark import FakeKeyboard
+
+    keys = FakeInput()
+    keys.install(main)
+
+    rng = random.Random(args.seed)
+    with open(CONFIG_FILE, "w") as f:
+        json.dump(soak_config(args, rng), f, indent=2)
+    app = main.MacroApp()
+    app.runner.keyboard = FakeKeyboard()
+    app.show()
+    user = SimulatedUser(app, keys, rng, args.speed)
+
+    duration = args.minutes * 60
+    warmup = duration * WARMUP_FRACTION
+    started = time.monotonic()
+    samples = []
+    state = {"measured_from": None, "before": None}
+
+    def sample():
+        s = Sample(time.monotonic() - started, app.runner)
+        samples.append(s)
+        print(s.line(args.speed), flush=True)
+        if state["before"] is None and s.elapsed >= warmup:
+            # Taking the snapshot grows the heap, so measure from the next sample
+            state["before"] = tracemalloc.take_snapshot()
+            state["measured_from"] = len(samples)
+        if s.elapsed >= duration:
+            qt_app.quit()
+
+    action_timer = QTimer()
+    action_timer.timeout.connect(user.act)
+    action_timer.start(max(1, int(HUMAN_ACTION_GAP / args.speed * 1000)))
+    sample_timer = QTimer()
+    sample_timer.timeout.connect(sample)
+    sample_timer.start(int(args.sample * 1000))
+
+    app.start_macro()
+    qt_app.exec()
+    action_timer.stop()
+    sample_timer.stop()
+    after = tracemalloc.take_snapshot()
+    app.close()
+
+    actions = ", ".join(f"{name} {n}" for name, n in sorted(user.counts.items()))
+    print(f"Actions: {actions}")
+    measured = samples[state["measured_from"]:]
+    if len(measured) < 2:
+        print("Too few samples after warm-up; run longer or sample more often")
+        return 1
+    print_top_allocations(state["before"], after)
+    print("After warm-up:")
+    failed = evaluate(args, measured)
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+        return 1
+    print("PASSED")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=10.0, help="real minutes to run")
+    parser.add_argument("--speed", type=float, default=100.0, help="time compression factor")
+    parser.add_argument("--macros", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sample", type=float, default=5.0, help="seconds between samples")
+    parser.add_argument("--max-rss-mb", type=float, default=20.0)
+    parser.add_argument("--max-threads", type=int, default=2)
+    parser.add_argument("--max-handles", type=int, default=10)
+    parser.add_argument("--max-traced-mb", type=float, default=5.0)
+    parser.add_argument("--max-queue", type=int, default=1000, help="GUI signals emitted but not yet handled")
+    args = parser.parse_args(argv)
+
+    # The app reads and writes config.json and its log in the working
+    # directory, so run in a scratch one
+    scratch = tempfile.mkdtemp(prefix="macro-soak-")
+    cwd = os.getcwd()
+    os.chdir(scratch)
+    tracemalloc.start()
+    try:
+        return run(args)
+    finally:
+        tracemalloc.stop()
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
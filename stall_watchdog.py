@@ -0,0 +1,77 @@
+import gc
+import threading
+import time
+from collections import deque
+
+
+class StallWatchdog:
+    """Detects scheduler stalls and guesses what caused them.
+
+    A daemon thread sleeps for `interval` seconds at a time; waking up
+    more than `threshold` seconds late means nothing in the process could
+    run Python code. The stall is blamed on a GC pass if one overlapped it,
+    on the GUI thread if its heartbeat went stale, and otherwise on GIL
+    contention.
+    """
+
+    def __init__(self, stats, threshold=0.02, interval=0.005, gui_interval=0.05):
+        self.stats = stats
+        self.threshold = threshold
+        self.interval = interval
+        self.gui_interval = gui_interval
+        self.stalls = deque(maxlen=512)  # (wall time, duration, cause)
+        self.gc_passes = deque(maxlen=64)  # (start, end) monotonic
+        self.gc_started = None
+        self.gui_last_beat = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread:
+            return
+        self.stop_event.clear()
+        gc.callbacks.append(self._on_gc)
+        self.thread = threading.Thread(target=self._run, name="stall-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.thread:
+            return
+        self.stop_event.set()
+        self.thread.join(timeout=1)
+        self.thread = None
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def gui_heartbeat(self):
+        """Called periodically from the GUI thread"""
+        self.gui_last_beat = time.monotonic()
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_started = time.monotonic()
+        elif self.gc_started is not None:
+            self.gc_passes.append((self.gc_started, time.monotonic()))
+            self.gc_started = None
+
+    def _cause(self, begin, end):
+        if self.gc_started is not None:
+            return "gc"
+        for gc_start, gc_end in self.gc_passes:
+            if gc_start < end and gc_end > begin:
+                return "gc"
+        beat = self.gui_last_beat
+        if beat is not None and end - beat > self.gui_interval + self.threshold:
+            return "gui"
+        return "gil"
+
+    def _run(self):
+        last = time.monotonic()
+        while not self.stop_event.wait(self.interval):
+            now = time.monotonic()
+            late = now - last - self.interval
+            if late > self.threshold:
+                cause = self._cause(last + self.interval, now)
+                self.stalls.append((time.time() - late, late, cause))
+                self.stats.record_stall(cause, late)
+            last = now
@@ -0,0 +1,42 @@
+import time
+
+from log_pipeline import get_logger
+
+
+log = get_logger("startup")
+
+
+class StartupTimer:
+    """Splits the time from process start to first paint into phases.
+
+    `mark(phase)` closes the phase that has been running since the
+    previous mark; report() logs them all once, as a warning when the
+    total is over budget.
+    """
+
+    def __init__(self, started_at=None):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.last = self.started_at
+        self.phases = []  # (name, seconds)
+        self.reported = False
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.started_at
+
+    def summary(self):
+        parts = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases)
+        return f"Startup took {self.total() * 1000:.0f} ms ({parts})"
+
+    def report(self, budget):
+        if self.reported:
+            return
+        self.reported = True
+        if self.total() > budget:
+            log.warning("%s, over the %.0f ms budget", self.summary(), budget * 1000)
+        else:
+            log.info("%s", self.summary())
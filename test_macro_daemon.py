@@ -0,0 +1,80 @@
+"""Reload behaviour of the headless daemon. Run with python -m unittest."""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmark import FakeKeyboard
+from macro_daemon import MacroDaemon
+from macro_runner import MacroRunner
+
+
+GOOD = {"macros": [{"name": "a", "key": "a", "delay": 0.5}], "auto_phase": False}
+
+
+class ReloadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "config.json")
+        self.write(GOOD)
+        self.daemon = MacroDaemon(self.path, hotkeys=False)
+        self.daemon.runner = MacroRunner(FakeKeyboard())
+        self.daemon.load()
+        self.daemon.handle("start")
+
+    def tearDown(self):
+        self.daemon.stop()
+        shutil.rmtree(self.directory)
+
+    def write(self, data):
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+
+    def assert_bad_reload_keeps_session(self, data, message):
+        session = self.daemon.runner.session
+        self.write(data)
+        with self.assertRaisesRegex(ValueError, message):
+            self.daemon.handle("reload")
+        self.assertEqual(self.daemon.handle("status"), "running")
+        self.assertEqual(self.daemon.runner.session, session)
+        self.assertEqual(self.daemon.data["macros"], GOOD["macros"])
+
+    def test_missing_key(self):
+        self.assert_bad_reload_keeps_session({"macros": [{"name": "a", "delay": 1}]}, "key is required")
+
+    def test_unknown_log_level(self):
+        self.assert_bad_reload_keeps_session(dict(GOOD, log_level="VERBOSE"), "unknown log level")
+
+    def test_bad_thread_priority(self):
+        self.assert_bad_reload_keeps_session(dict(GOOD, thread_priority="urgent"), "thread_priority")
+
+    def test_unknown_chain_parent(self):
+        macros = GOOD["macros"] + [{"name": "b", "key": "b", "after": {"macro": "c"}}]
+        self.assert_bad_reload_keeps_session({"macros": macros}, "follows 'c'")
+
+    def test_invalid_json(self):
+        with open(self.path, "w") as f:
+            f.write("{")
+        with self.assertRaises(ValueError):
+            self.daemon.handle("reload")
+        self.assertEqual(self.daemon.handle("status"), "running")
+
+    def test_good_reload_restarts(self):
+        session = self.daemon.runner.session
+        self.write({"macros": [{"name": "b", "key": "b", "delay": 0.2}], "auto_phase": False})
+        self.assertEqual(self.daemon.handle("reload"), "running")
+        self.assertEqual(self.daemon.runner.session, session + 1)
+        self.assertEqual(self.daemon.runner.specs[0].key, "b")
+
+    def test_loglevel_replies_with_level(self):
+        self.daemon.setup_logging()
+        try:
+            self.assertEqual(self.daemon.handle("loglevel", "debug"), "DEBUG")
+            self.assertEqual(self.daemon.handle("loglevel", "warning"), "WARNING")
+        finally:
+            self.daemon.log_pipeline.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
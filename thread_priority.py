@@ -0,0 +1,144 @@
+import os
+import sys
+import threading
+
+from log_pipeline import get_logger
+
+
+log = get_logger("priority")
+
+PRIORITIES = ("normal", "high", "realtime")
+NICE_HIGH = -10  # Linux nice value for "high"
+FIFO_PRIORITY = 10  # SCHED_FIFO level for "realtime"; low enough to leave room for kernel threads
+
+# Windows SetThreadPriority levels
+THREAD_PRIORITY_HIGHEST = 2
+THREAD_PRIORITY_TIME_CRITICAL = 15
+
+
+def parse_affinity(raw):
+    """"cpu_affinity" config value as a tuple of CPU indexes, or None for any CPU"""
+    if raw is None or raw == []:
+        return None
+    if isinstance(raw, int):
+        raw = [raw]
+    try:
+        cpus = tuple(sorted({int(cpu) for cpu in raw}))
+    except (TypeError, ValueError):
+        raise ValueError(f"cpu_affinity must be a CPU number or a list of them, got {raw!r}")
+    if cpus[0] < 0:
+        raise ValueError("cpu_affinity CPU numbers must not be negative")
+    return cpus
+
+
+class ThreadTuner:
+    """Raises the priority of, and pins, the threads that call apply().
+
+    Each runner thread calls apply() as it starts. Whatever the OS refuses
+    falls back a step ("realtime" -> "high" -> "normal", pinned -> any CPU)
+    instead of failing, and each distinct outcome is logged once so the
+    effective settings show up in the log.
+    """
+
+    def __init__(self, priority="normal", cpus=None):
+        if priority not in PRIORITIES:
+            raise ValueError(f"thread_priority must be one of {', '.join(PRIORITIES)}, got {priority!r}")
+        self.priority = priority
+        self.cpus = cpus
+        self.lock = threading.Lock()
+        self.outcomes = {}  # (priority, cpus, reason) -> threads that got it
+
+    @property
+    def active(self):
+        return self.priority != "normal" or self.cpus is not None
+
+    def apply(self):
+        """Tune the calling thread; returns (priority, cpus, reason) as applied"""
+        priority, reason = self._set_priority(self.priority)
+        cpus, cpu_reason = self._set_affinity(self.cpus)
+        reason = "; ".join(r for r in (reason, cpu_reason) if r)
+        outcome = (priority, cpus, reason)
+        with self.lock:
+            first = outcome not in self.outcomes
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        if first:
+            if reason:
+                log.warning("Runner threads: %s (%s)", describe(priority, cpus), reason)
+            else:
+                log.info("Runner threads: %s", describe(priority, cpus))
+        return outcome
+
+    def summary(self):
+        """Effective settings per thread count, e.g. "realtime on CPU 2 x5" """
+        with self.lock:
+            outcomes = sorted(self.outcomes.items(), key=lambda kv: -kv[1])
+        if not outcomes:
+            return describe(self.priority, self.cpus) if not self.active else "not applied yet"
+        return ", ".join(f"{describe(p, c)} x{n}" for (p, c, _), n in outcomes)
+
+    def _set_priority(self, wanted):
+        """Best priority the OS allows, up to `wanted`; returns (priority, reason)"""
+        reasons = []
+        for priority in PRIORITIES[PRIORITIES.index(wanted):0:-1]:
+            try:
+                _set_thread_priority(priority)
+                return priority, "; ".join(reasons)
+            except (OSError, NotImplementedError) as e:
+                reasons.append(f"{priority} refused: {e}")
+        return "normal", "; ".join(reasons)
+
+    def _set_affinity(self, cpus):
+        if cpus is None:
+            return None, ""
+        try:
+            _set_thread_affinity(cpus)
+        except (OSError, NotImplementedError, ValueError) as e:
+            return None, f"pinning to {cpus} refused: {e}"
+        return cpus, ""
+
+
+def describe(priority, cpus):
+    if cpus is None:
+        return priority
+    label = "CPU" if len(cpus) == 1 else "CPUs"
+    return f"{priority} on {label} {','.join(str(cpu) for cpu in cpus)}"
+
+
+# Platform hooks, each acting on the calling thread only
+if sys.platform.startswith("linux"):
+    def _set_thread_priority(priority):
+        if priority == "realtime":
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(FIFO_PRIORITY))
+        else:
+            # A thread's nice value is per task on Linux, so this leaves
+            # the rest of the process alone
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), NICE_HIGH)
+
+    def _set_thread_affinity(cpus):
+        os.sched_setaffinity(0, cpus)
+
+elif sys.platform == "win32":
+    import ctypes
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _kernel32.GetCurrentThread.restype = ctypes.c_void_p
+    _kernel32.SetThreadPriority.argtypes = (ctypes.c_void_p, ctypes.c_int)
+    _kernel32.SetThreadAffinityMask.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+    _kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+
+    def _set_thread_priority(priority):
+        level = THREAD_PRIORITY_TIME_CRITICAL if priority == "realtime" else THREAD_PRIORITY_HIGHEST
+        if not _kernel32.SetThreadPriority(_kernel32.GetCurrentThread(), level):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def _set_thread_affinity(cpus):
+        mask = sum(1 << cpu for cpu in cpus)
+        if not _kernel32.SetThreadAffinityMask(_kernel32.GetCurrentThread(), mask):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+else:
+    def _set_thread_priority(priority):
+        raise NotImplementedError(f"not supported on {sys.platform}")
+
+    def _set_thread_affinity(cpus):
+        raise NotImplementedError(f"not supported on {sys.platform}")
@@ -0,0 +1,120 @@
+import queue
+import threading
+
+import numpy as np
+
+
+BATCH_SIZE = 256  # Variates drawn per refill
+
+
+def spawn_generators(seed, count):
+    """One independent generator per macro id. The same `seed` gives the
+    same draws for each macro, however the session interleaves them."""
+    return [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(count)]
+
+
+def draw_noise(jitter, rng, count):
+    """`count` delay offsets (seconds) for a (distribution, spread, min_gap)
+    jitter spec:
+
+    uniform  evenly within +-spread
+    normal   standard deviation spread, unbounded
+    clamped  standard deviation spread / 2, cut off at +-spread
+    """
+    distribution, spread, _ = jitter
+    if distribution == "uniform":
+        return rng.uniform(-spread, spread, count)
+    if distribution == "normal":
+        return rng.normal(0.0, spread, count)
+    return np.clip(rng.normal(0.0, spread / 2, count), -spread, spread)
+
+
+def jittered_delays(jitter, rng, delay, count):
+    """`count` successive delays as the runner would draw them"""
+    return np.maximum(jitter[2], delay + draw_noise(jitter, rng, count))
+
+
+class DelayStream:
+    """Pre-drawn timing noise for one macro.
+
+    The macro thread takes values with next(), which is a list index until
+    a batch runs out. Then the spare batch is swapped in and the refiller
+    draws the next spare in the background. Batches are drawn under a lock
+    and used in draw order, so a seeded stream stays reproducible even if
+    the refiller falls behind and a batch has to be drawn inline.
+    """
+
+    def __init__(self, jitter, rng, refiller):
+        self.jitter = jitter
+        self.rng = rng
+        self.refiller = refiller
+        self.lock = threading.Lock()
+        self.inline_refills = 0
+        self.buffer = self._draw()
+        self.spare = self._draw()
+        self.pos = 0
+
+    def _draw(self):
+        return draw_noise(self.jitter, self.rng, BATCH_SIZE).tolist()
+
+    def next_delay(self, delay):
+        """`delay` with the next offset applied, never below min_gap"""
+        if self.pos >= len(self.buffer):
+            with self.lock:
+                if self.spare is None:
+                    self.spare = self._draw()  # Refiller fell behind
+                    self.inline_refills += 1
+                self.buffer, self.spare = self.spare, None
+            self.pos = 0
+            self.refiller.request(self)
+        noise = self.buffer[self.pos]
+        self.pos += 1
+        return max(self.jitter[2], delay + noise)
+
+    def refill(self):
+        with self.lock:
+            if self.spare is None:
+                self.spare = self._draw()
+
+
+class StreamRefiller:
+    """Background thread drawing spare batches for DelayStreams"""
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+
+    def start(self):
+        if self.thread:
+            return
+        self.thread = threading.Thread(target=self._run, name="delay-refill", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.thread:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout=1)
+        self.thread = None
+
+    def request(self, stream):
+        self.queue.put(stream)
+
+    def _run(self):
+        while True:
+            stream = self.queue.get()
+            if stream is None:
+                return
+            stream.refill()
+
+
+def make_streams(specs, seed=None):
+    """A DelayStream per spec with jitter (None for the rest), sharing one
+    refiller; returns (streams, refiller)"""
+    refiller = StreamRefiller()
+    rngs = spawn_generators(seed, len(specs))
+    streams = [
+        DelayStream(spec.jitter, rng, refiller) if spec.jitter else None
+        for spec, rng in zip(specs, rngs)
+    ]
+    return streams, refiller